@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 import maya.cmds as cmds
+import maya.api.OpenMaya as om
+import math
 
 from .utils import (
     undoWrapper,
@@ -7,8 +9,11 @@ from .utils import (
     lockHideAttr,
     disableRenderStats,
     setOverrideColor,
-    setOutlinerColor
+    setOutlinerColor,
+    getColliderNodes
 )
+from . import sdf as sdfGrid
+from . import expstr
 
 @undoWrapper
 def iplane(*args):
@@ -192,6 +197,185 @@ def cuboid(*args):
     return root
 
 
+@undoWrapper
+def heightfield(resolutionU=8, resolutionV=8, *args):
+    resolutionU = max(2, int(resolutionU))
+    resolutionV = max(2, int(resolutionV))
+
+    root, makePlane = cmds.polyPlane(w=10, h=10, sx=resolutionU-1, sy=resolutionV-1, ax=[0,1,0], n=getUniqueName('heightfieldCollider'))
+    lockHideAttr(root, ['sx','sy','sz'])
+    addCommonAttr(root, 'heightfield')
+    cmds.addAttr(root, ln='width', nn='Width', at='double', dv=10, min=0.001, k=True)
+    cmds.addAttr(root, ln='depth', nn='Depth', at='double', dv=10, min=0.001, k=True)
+    cmds.addAttr(root, ln='resolutionU', nn='Resolution U', at='long', dv=resolutionU)
+    cmds.addAttr(root, ln='resolutionV', nn='Resolution V', at='long', dv=resolutionV)
+    cmds.addAttr(root, ln='heights', nn='Heights', at='double', multi=True)
+    cmds.setAttr(root + '.resolutionU', l=True)
+    cmds.setAttr(root + '.resolutionV', l=True)
+    setOutlinerColor(root, [1,1,0])
+    disableRenderStats(root)
+
+    # connectAttr
+    cmds.connectAttr(root + '.width', makePlane + '.width', f=True)
+    cmds.connectAttr(root + '.depth', makePlane + '.height', f=True)
+    sh = cmds.listRelatives(root, s=True)[0]
+    setOverrideColor(sh, 17)
+    cmds.connectAttr(root + '.displayType', sh + '.overrideDisplayType', f=True)
+
+    # heights (row-major, u along +X, v along -Z. same order as polyPlane vertices)
+    for i in range(resolutionU * resolutionV):
+        cmds.setAttr('{}.heights[{}]'.format(root, i), 0.0)
+        cmds.connectAttr('{}.heights[{}]'.format(root, i), '{}.pnts[{}].pnty'.format(sh, i), f=True)
+
+    return root
+
+@undoWrapper
+def setHeights(col, heights, *args):
+    """ set sampled heights of heightfield collider
+
+    Args:
+        col (str): heightfield collider.
+        heights (list): heights as flat list (resolutionU * resolutionV) or nested list [v][u].
+    """
+    resolutionU = cmds.getAttr(col + '.resolutionU')
+    resolutionV = cmds.getAttr(col + '.resolutionV')
+
+    if heights and isinstance(heights[0], (list, tuple)):
+        heights = [h for row in heights for h in row]
+
+    if len(heights) != resolutionU * resolutionV:
+        cmds.error('{} requires {} heights ({} x {}).'.format(col, resolutionU * resolutionV, resolutionU, resolutionV))
+
+    for i, h in enumerate(heights):
+        cmds.setAttr('{}.heights[{}]'.format(col, i), h)
+
+
+@undoWrapper
+def sdf(mesh=None, resolution=8, padding=0.5, *args):
+    """ bake mesh into signed distance field collider
+
+    Args:
+        mesh (str, optional): mesh to bake. Defaults to selected mesh.
+        resolution (int, optional): number of samples along the longest axis. Defaults to 8.
+        padding (float, optional): margin around bounding box of the mesh. Should be larger than the radius used by detections. Defaults to 0.5.
+
+    Returns:
+        str: Created collider.
+    """
+    if not mesh:
+        sel = cmds.ls(sl=True, type='transform')
+        if not sel:
+            cmds.error('Select a mesh to bake.')
+        mesh = sel[0]
+
+    resolution = max(2, int(resolution))
+    bb = cmds.exactWorldBoundingBox(mesh)
+    center = [(bb[a] + bb[a+3]) / 2.0 for a in range(3)]
+    size = [bb[a+3] - bb[a] + padding * 2.0 for a in range(3)]
+    cellSize = max(size) / (resolution - 1)
+    res = [max(2, int(math.ceil(s / cellSize)) + 1) for s in size]
+    origin = sdfGrid.origin(res, cellSize)
+
+    # bake
+    sl = om.MSelectionList()
+    sl.add(mesh)
+    fnMesh = om.MFnMesh(sl.getDagPath(0))
+    accel = fnMesh.autoUniformGridParams()
+    rays = [om.MFloatVector(1, 0.0123, 0.0071).normal(), om.MFloatVector(-0.0093, 1, 0.0157).normal(), om.MFloatVector(0.0111, -0.0087, 1).normal()]
+    distances = []
+    for k in range(res[2]):
+        for j in range(res[1]):
+            for i in range(res[0]):
+                p = om.MPoint(
+                    center[0] + origin[0] + i * cellSize,
+                    center[1] + origin[1] + j * cellSize,
+                    center[2] + origin[2] + k * cellSize
+                )
+                cp, normal, faceId = fnMesh.getClosestPointAndNormal(p, om.MSpace.kWorld)
+                d = (p - cp).length()
+
+                # inside test by parity of ray intersections (majority of 3 rays).
+                # normal of closest point is not reliable on edges and vertices.
+                inside = 0
+                for ray in rays:
+                    hits = fnMesh.allIntersections(om.MFloatPoint(p), ray, om.MSpace.kWorld, 99999, False, None, None, False, accel)
+                    if len(hits[0]) % 2 == 1:
+                        inside += 1
+                if inside >= 2:
+                    d = -d
+                distances.append(d)
+
+    root = cmds.createNode('transform', n=getUniqueName('sdfCollider'))
+    cmds.xform(root, ws=True, t=center)
+    lockHideAttr(root, ['sx','sy','sz'])
+    addCommonAttr(root, 'sdf', 'mesh')
+    cmds.addAttr(root, ln='resolutionX', nn='Resolution X', at='long', dv=res[0])
+    cmds.addAttr(root, ln='resolutionY', nn='Resolution Y', at='long', dv=res[1])
+    cmds.addAttr(root, ln='resolutionZ', nn='Resolution Z', at='long', dv=res[2])
+    cmds.addAttr(root, ln='cellSize', nn='Cell Size', at='double', dv=cellSize)
+    cmds.addAttr(root, ln='distances', nn='Distances', dt='doubleArray')
+    cmds.setAttr(root + '.distances', distances, type='doubleArray')
+    for at in ['resolutionX', 'resolutionY', 'resolutionZ', 'cellSize', 'distances']:
+        cmds.setAttr('{}.{}'.format(root, at), l=True)
+    setOutlinerColor(root, [1,1,0])
+
+    # display mesh
+    dup = cmds.duplicate(mesh, rr=True, n='{}_mesh'.format(root))[0]
+    children = cmds.listRelatives(dup, c=True, type='transform', f=True)
+    if children:
+        cmds.delete(children)
+    for at in ['tx','ty','tz','rx','ry','rz','sx','sy','sz','v']:
+        cmds.setAttr('{}.{}'.format(dup, at), l=False)
+    cmds.parent(dup, root)
+    lockHideAttr(dup, 'all')
+    disableRenderStats(dup)
+    setOverrideColor(dup, 17)
+
+    # connectAttr
+    cmds.connectAttr("{}.message".format(dup), "{}.{}".format(root, 'mesh'))
+    cmds.connectAttr(root + '.displayType', dup + '.overrideDisplayType', f=True)
+
+    return root
+
+
+@undoWrapper
+def add_hub(col, *args):
+    """ add data hub to collider
+
+    Derived world-space values of the collider (axis, length, scaled radius, half extents, etc.) are computed once
+    by the hub expression, and detections created after this read them instead of computing them in each expression.
+
+    Args:
+        col (str): collider.
+
+    Returns:
+        str: Created hub node (network).
+    """
+    if cmds.attributeQuery('hub', node=col, ex=True):
+        hub = cmds.listConnections(col + '.hub', d=0)
+        if hub:
+            return hub[0]
+    else:
+        cmds.addAttr(col, ln='hub', at='message')
+
+    colliderType = cmds.getAttr(col + '.colliderType')
+    vectors, floats = expstr.HUB_ATTRS[colliderType]
+
+    hub = cmds.createNode('network', n='{}_hub'.format(col))
+    for v in vectors:
+        cmds.addAttr(hub, ln=v, at='double3')
+        for axis in 'XYZ':
+            cmds.addAttr(hub, ln=v + axis, at='double', p=v)
+    for f in floats:
+        cmds.addAttr(hub, ln=f, at='double')
+    cmds.connectAttr(hub + '.message', col + '.hub', f=True)
+
+    nodes = getColliderNodes(col, colliderType)
+    cmds.expression(s=expstr.hub(col, colliderType, nodes, hub), name='{}_hubExp'.format(col), alwaysEvaluate=False)
+
+    return hub
+
+
 def addCommonAttr(obj, colliderType, *args):
     cmds.addAttr(obj, ln='colliderType', nn='Collider Type', dt='string', k=False)
     cmds.setAttr(obj + '.colliderType', colliderType, type='string')
@@ -1,13 +1,17 @@
 # -*- coding: utf-8 -*-
 import maya.cmds as cmds
 import math
+import re
+import timeit
 
 from .utils import (
     undoWrapper, 
     lockHideAttr, 
     createDecomposeMatrix,
-    createUnitVector
+    getColliderNodes,
+    mergeDuplicateNodes
 )
+from . import expstr
 
 class CreateConfig:
     
@@ -50,6 +54,8 @@ def create_standard(
         groundCol=False, 
         scalable=False, 
         radius_rate=None,
+        segment=False,
+        neighbors=[],
         *args, 
         **kwargs
     ):
@@ -64,6 +70,8 @@ def create_standard(
         groundCol (bool, optional): add horizontal plane collision. Defaults to False.
         scalable (bool, optional): allow for parent scale of joint-chain and parent scale of colliders. Defaults to False.
         radius_rate (float, optional): rate at which radius and tip radius are interpolated, between 0 and 1. Defaults to None.
+        segment (bool, optional): detect the link from parent to input as a capsule, and rotate it about parent. Ignored if parent is None. Defaults to False.
+        neighbors (list, optional): inputs of corresponding links of neighbouring chains, kept at Chain Separation distance. Defaults to [].
 
     Returns:
         tuple: Created expression node (exp_node), implicitSphere node for radius visualization (p_radius), and vectorProduct node connected to output (output_vp).
@@ -74,7 +82,9 @@ def create_standard(
     
     use_tip_radius = not radius_rate is None
 
-    add_control_attr(controller, groundCol, use_tip_radius)
+    neighbors = [n for n in neighbors if cmds.objExists(n)]
+
+    add_control_attr(controller, groundCol, use_tip_radius, separation=bool(neighbors))
 
     input_dm = createDecomposeMatrix(input)
     output_vp = cmds.createNode('vectorProduct')
@@ -93,262 +103,76 @@ def create_standard(
     cmds.setAttr(p_radius_shape + '.overrideDisplayType', 2)
     
 
+    segment = segment and bool(parent)
+
     colliderExpStr = []
     for j, col in enumerate(colliders):
         if cmds.objExists(col):
-            defineStr, detectionStr = setupCollision(col, j, cmds.getAttr(col + '.colliderType'), scalable=scalable)
+            defineStr, detectionStr = setupCollision(col, j, cmds.getAttr(col + '.colliderType'), scalable=scalable, segment=segment)
             colliderExpStr.append([defineStr, detectionStr])
 
     # expression string
-    expStr = ""
-    
+    parent_dm = None
+    scale_dm = None
+    distance = None
     if parent:
         parent_dm = createDecomposeMatrix(parent)
-        expStr += "vector $p0 = <<{0}.outputTranslateX, {0}.outputTranslateY, {0}.outputTranslateZ>>;\n\n".format(parent_dm)
+        scale_dm = parent_dm
+        vec = []
+        vec.append(cmds.getAttr(input_dm + '.outputTranslateX') - cmds.getAttr(parent_dm + '.outputTranslateX'))
+        vec.append(cmds.getAttr(input_dm + '.outputTranslateY') - cmds.getAttr(parent_dm + '.outputTranslateY'))
+        vec.append(cmds.getAttr(input_dm + '.outputTranslateZ') - cmds.getAttr(parent_dm + '.outputTranslateZ'))
+        distance = math.sqrt(vec[0]**2 + vec[1]**2 + vec[2]**2)
     else:
         input_parent = cmds.listRelatives(input, p=True)
         if input_parent:
-            parent_dm = createDecomposeMatrix(input_parent[0])
-        else:
-            scalable = False
-    
-    expStr += "vector $p = <<{0}.outputTranslateX, {0}.outputTranslateY, {0}.outputTranslateZ>>;\n".format(input_dm)
-
-    if scalable:
-        expStr += "float $p_scaleFactor = abs({0}.outputScaleZ);\n".format(parent_dm)
-        if use_tip_radius:
-            if radius_rate == 0.0:
-                expStr += "float $p_radius = {0}.radius * $p_scaleFactor;\n".format(controller)
-            elif radius_rate == 1.0:
-                expStr += "float $p_radius = {0}.tipRadius * $p_scaleFactor;\n".format(controller)
-            else:
-                expStr += "float $p_radius = ({0}.radius*{1} + {0}.tipRadius*{2}) * $p_scaleFactor;\n".format(controller, 1.0-radius_rate, radius_rate)
-        else:
-            expStr += "float $p_radius = {0}.radius * $p_scaleFactor;\n".format(controller)
-        if parent:
-            expStr += "float $d = mag($p - $p0);\n\n"
-    else:
-        if use_tip_radius:
-            if radius_rate == 0.0:
-                expStr += "float $p_radius = {0}.radius;\n".format(controller)
-            elif radius_rate == 1.0:
-                expStr += "float $p_radius = {0}.tipRadius;\n".format(controller)
-            else:
-                expStr += "float $p_radius = {0}.radius*{1} + {0}.tipRadius*{2};\n".format(controller, 1.0-radius_rate, radius_rate)
-        else:
-            expStr += "float $p_radius = {0}.radius;\n".format(controller)
-        if parent:
-            vec = []
-            vec.append(cmds.getAttr(input_dm + '.outputTranslateX') - cmds.getAttr(parent_dm + '.outputTranslateX'))
-            vec.append(cmds.getAttr(input_dm + '.outputTranslateY') - cmds.getAttr(parent_dm + '.outputTranslateY'))
-            vec.append(cmds.getAttr(input_dm + '.outputTranslateZ') - cmds.getAttr(parent_dm + '.outputTranslateZ'))
-            expStr += "float $d = {};\n\n".format(math.sqrt(vec[0]**2 + vec[1]**2 + vec[2]**2))
-    
-    # collider define
-    for cs in colliderExpStr:
-        expStr += cs[0]
-    
-    # ground height
-    if groundCol:
-        expStr += "//ground\n"
-        expStr += "float $groundHeight = {}.groundHeight;\n\n".format(controller)
-    
-    # collision iteration
-    expStr += "//collision iteration\n"
-    expStr += "for($i = 0; $i < {}.colIteration; $i++)\n".format(controller)
-    expStr += "{\n"
-
-    for cs in colliderExpStr:
-        expStr += cs[1]
-
-    if groundCol:
-        expStr += "\t//ground\n"
-        expStr += "\tif($p.y < ($groundHeight + $p_radius))\n"
-        expStr += "\t{\n"
-        expStr += "\t\t$p = <<$p.x, ($groundHeight + $p_radius), $p.z>>;\n"
-        expStr += "\t}\n\n"
-
-    if parent:
-        expStr += "\t//keep length\n"
-        expStr += "\t$p = $p0 + (unit($p - $p0) * $d);\n"
+            scale_dm = createDecomposeMatrix(input_parent[0])
 
-    expStr += "}\n\n"
-
-    # output
-    expStr += "{}.input1X = $p.x;\n".format(output_vp)
-    expStr += "{}.input1Y = $p.y;\n".format(output_vp)
-    expStr += "{}.input1Z = $p.z;\n".format(output_vp)
-
-    if scalable:
-        expStr += "{}.scaleX = $p_radius / $p_scaleFactor;\n".format(p_radius)
-        expStr += "{}.scaleY = $p_radius / $p_scaleFactor;\n".format(p_radius)
-        expStr += "{}.scaleZ = $p_radius / $p_scaleFactor;\n".format(p_radius)
-    else:
-        expStr += "{}.scaleX = $p_radius;\n".format(p_radius)
-        expStr += "{}.scaleY = $p_radius;\n".format(p_radius)
-        expStr += "{}.scaleZ = $p_radius;\n".format(p_radius)
+    expStr = expstr.detection(
+        controller, 
+        input_dm, 
+        output_vp, 
+        colliderExpStr, 
+        p_radius=p_radius, 
+        parent_dm=parent_dm, 
+        scale_dm=scale_dm, 
+        groundCol=groundCol, 
+        scalable=scalable, 
+        radius_rate=radius_rate, 
+        distance=distance, 
+        segment=segment, 
+        neighbors=[createDecomposeMatrix(n) for n in neighbors]
+    )
     
     # create expression
     exp_node = cmds.expression(s=expStr, name='{}_expCol'.format(input), alwaysEvaluate=False)
 
     return exp_node, p_radius, output_vp
 
-def setupCollision(col, index, colliderType, scalable=False, *args):
-    defineStr = "//{}\n".format(col)
-    detectionStr = "\t//{}\n".format(col)
+def setupCollision(col, index, colliderType, scalable=False, segment=False, *args):
+    data = {}
 
-    if colliderType == 'sphere':
-        dm = createDecomposeMatrix(col)
+    hub = None
+    if cmds.attributeQuery('hub', node=col, ex=True):
+        hub = cmds.listConnections(col + '.hub', d=0)
+    if hub:
+        nodes = {'hub': hub[0]}
+    else:
+        nodes = getColliderNodes(col, colliderType)
+
+    if colliderType == 'heightfield':
+        data['resolutionU'] = cmds.getAttr(col + '.resolutionU')
+        data['resolutionV'] = cmds.getAttr(col + '.resolutionV')
+    elif colliderType == 'sdf':
+        data['resolution'] = [
+            cmds.getAttr(col + '.resolutionX'),
+            cmds.getAttr(col + '.resolutionY'),
+            cmds.getAttr(col + '.resolutionZ')
+        ]
+        data['cellSize'] = cmds.getAttr(col + '.cellSize')
+        data['distances'] = cmds.getAttr(col + '.distances')
 
-        defineStr += "vector $c{0} = <<{1}.outputTranslateX, {1}.outputTranslateY, {1}.outputTranslateZ>>;\n".format(index, dm)
-        if scalable:
-            defineStr += "float $c{0}_scaleFactor = {1}.outputScaleZ;\n".format(index, dm)
-            defineStr += "float $c{0}_radius = {1}.radius * $c{0}_scaleFactor;\n\n".format(index, col)
-        else:
-            defineStr += "float $c{0}_radius = {1}.radius;\n\n".format(index, col)
-
-        detectionStr += "\tif (($c{0}_radius+$p_radius) * ($c{0}_radius+$p_radius) > dot($p-$c{0}, $p-$c{0}))\n".format(index)
-        detectionStr += "\t{\n"
-        detectionStr += "\t\t$p = $c{0} + (unit($p - $c{0}) * ($c{0}_radius + $p_radius));\n".format(index)
-        detectionStr += "\t}\n\n"
-
-    elif colliderType == 'infinitePlane':
-        dm = createDecomposeMatrix(col)
-        vp = createUnitVector(col, vec=[0,1,0])
-
-        defineStr += "vector $c{0} = <<{1}.outputTranslateX, {1}.outputTranslateY, {1}.outputTranslateZ>>;\n".format(index, dm)
-        defineStr += "vector $c{0}_normal = <<{1}.outputX, {1}.outputY, {1}.outputZ>>;\n\n".format(index, vp)
-
-        detectionStr += "\t$distancePointPlane = dot($c{0}_normal, ($p - $c{0}));\n".format(index)
-        detectionStr += "\tif($distancePointPlane - $p_radius < 0)\n"
-        detectionStr += "\t{\n"
-        detectionStr += "\t\t$p = $p - ($c{0}_normal * ($distancePointPlane - $p_radius));\n".format(index)
-        detectionStr += "\t}\n\n"
-
-    elif colliderType == 'capsule':
-        a = cmds.listConnections(col + '.sphereA', d=0)[0]
-        b = cmds.listConnections(col + '.sphereB', d=0)[0]
-        dmA = createDecomposeMatrix(a)
-        dmB = createDecomposeMatrix(b)
-
-        defineStr += "vector $c{0}a = <<{1}.outputTranslateX, {1}.outputTranslateY, {1}.outputTranslateZ>>;\n".format(index, dmA)
-        defineStr += "vector $c{0}b = <<{1}.outputTranslateX, {1}.outputTranslateY, {1}.outputTranslateZ>>;\n".format(index, dmB)
-        if scalable:
-            defineStr += "float $c{0}_scaleFactor = {1}.outputScaleZ;\n".format(index, dmA)
-            defineStr += "float $c{0}_radius = {1}.radius * $c{0}_scaleFactor;\n".format(index, col)
-        else:
-            defineStr += "float $c{0}_radius = {1}.radius;\n".format(index, col)
-        defineStr += "float $c{0}_height = mag($c{0}b-$c{0}a);\n".format(index)
-        defineStr += "vector $c{0}ab = unit($c{0}b-$c{0}a);\n\n".format(index)
-
-        detectionStr += "\tfloat $t{0} = dot($c{0}ab,($p-$c{0}a));\n".format(index)
-        detectionStr += "\tfloat $sq_rad_sum{0} = ($c{0}_radius + $p_radius) * ($c{0}_radius + $p_radius);\n".format(index)
-        detectionStr += "\tif($t{0}/$c{0}_height <= 0)\n".format(index)
-        detectionStr += "\t{\n"
-        detectionStr += "\t\tif(dot($p-$c{0}a, $p-$c{0}a) < $sq_rad_sum{0})\n".format(index)
-        detectionStr += "\t\t\t$p = $c{0}a + (unit($p-$c{0}a) * ($c{0}_radius + $p_radius));\n".format(index)
-        detectionStr += "\t}\n"
-        detectionStr += "\telse if($t{0}/$c{0}_height >= 1)\n".format(index)
-        detectionStr += "\t{\n"
-        detectionStr += "\t\tif(dot($p-$c{0}b, $p-$c{0}b) < $sq_rad_sum{0})\n".format(index)
-        detectionStr += "\t\t\t$p = $c{0}b + (unit($p-$c{0}b) * ($c{0}_radius + $p_radius));\n".format(index)
-        detectionStr += "\t}\n"
-        detectionStr += "\telse\n"
-        detectionStr += "\t{\n"
-        detectionStr += "\t\tvector $q = $c{0}a + ($c{0}ab * $t{0});\n".format(index)
-        detectionStr += "\t\tif(dot($p-$q, $p-$q) < $sq_rad_sum{0})\n".format(index)
-        detectionStr += "\t\t\t$p = $q + (unit($p-$q) * ($c{0}_radius + $p_radius));\n".format(index)
-        detectionStr += "\t}\n\n"
-
-    elif colliderType == 'capsule2':
-        a = cmds.listConnections(col + '.sphereA', d=0)[0]
-        b = cmds.listConnections(col + '.sphereB', d=0)[0]
-        dmA = createDecomposeMatrix(a)
-        dmB = createDecomposeMatrix(b)
-
-        defineStr += "vector $c{0}a = <<{1}.outputTranslateX, {1}.outputTranslateY, {1}.outputTranslateZ>>;\n".format(index, dmA)
-        defineStr += "vector $c{0}b = <<{1}.outputTranslateX, {1}.outputTranslateY, {1}.outputTranslateZ>>;\n".format(index, dmB)
-        if scalable:
-            defineStr += "float $c{0}_scaleFactor = {1}.outputScaleZ;\n".format(index, dmA)
-            defineStr += "float $c{0}a_radius = {1}.radiusA * $c{0}_scaleFactor;\n".format(index, col)
-            defineStr += "float $c{0}b_radius = {1}.radiusB * $c{0}_scaleFactor;\n".format(index, col)
-        else:
-            defineStr += "float $c{0}a_radius = {1}.radiusA;\n".format(index, col)
-            defineStr += "float $c{0}b_radius = {1}.radiusB;\n".format(index, col)
-        defineStr += "float $c{0}_height = mag($c{0}b-$c{0}a);\n".format(index)
-        defineStr += "vector $c{0}ab = unit($c{0}b-$c{0}a);\n\n".format(index)
-
-        detectionStr += "\tfloat $t{0} = dot($c{0}ab,($p-$c{0}a));\n".format(index)
-        detectionStr += "\tfloat $ratio{0} = $t{0}/$c{0}_height;\n".format(index)
-        detectionStr += "\tif($ratio{0} <= 0)\n".format(index)
-        detectionStr += "\t{\n"
-        detectionStr += "\t\tif(dot($p-$c{0}a, $p-$c{0}a) < ($c{0}a_radius + $p_radius) * ($c{0}a_radius + $p_radius))\n".format(index)
-        detectionStr += "\t\t\t$p = $c{0}a + (unit($p-$c{0}a) * ($c{0}a_radius + $p_radius));\n".format(index)
-        detectionStr += "\t}\n"
-        detectionStr += "\telse if($ratio{0} >= 1)\n".format(index)
-        detectionStr += "\t{\n"
-        detectionStr += "\t\tif(dot($p-$c{0}b, $p-$c{0}b) < ($c{0}b_radius + $p_radius) * ($c{0}b_radius + $p_radius))\n".format(index)
-        detectionStr += "\t\t\t$p = $c{0}b + (unit($p-$c{0}b) * ($c{0}b_radius + $p_radius));\n".format(index)
-        detectionStr += "\t}\n"
-        detectionStr += "\telse\n"
-        detectionStr += "\t{\n"
-        detectionStr += "\t\tvector $q = $c{0}a + ($c{0}ab * $t{0});\n".format(index)
-        detectionStr += "\t\tfloat $r = $c{0}a_radius * (1.0 - $ratio{0}) + $c{0}b_radius * $ratio{0};\n".format(index)
-        detectionStr += "\t\tif(dot($p-$q, $p-$q) < ($r + $p_radius) * ($r + $p_radius))\n".format(index)
-        detectionStr += "\t\t\t$p = $q + (unit($p-$q) * ($r + $p_radius));\n".format(index)
-        detectionStr += "\t}\n\n"
-    
-    elif colliderType == 'cuboid':
-        dm = createDecomposeMatrix(col)
-        
-        # unit vector
-        vp_x = createUnitVector(col, vec=[1,0,0])
-        vp_y = createUnitVector(col, vec=[0,1,0])
-        vp_z = createUnitVector(col, vec=[0,0,1])
-
-        # define
-        defineStr += "vector $c{0} = <<{1}.outputTranslateX, {1}.outputTranslateY, {1}.outputTranslateZ>>;\n".format(index, dm)
-        defineStr += "vector $c{0}_vx = <<{1}.outputX, {1}.outputY, {1}.outputZ>>;\n".format(index, vp_x)
-        defineStr += "vector $c{0}_vy = <<{1}.outputX, {1}.outputY, {1}.outputZ>>;\n".format(index, vp_y)
-        defineStr += "vector $c{0}_vz = <<{1}.outputX, {1}.outputY, {1}.outputZ>>;\n".format(index, vp_z)
-        if scalable:
-            defineStr += "float $c{0}_scaleFactor = {1}.outputScaleZ;\n".format(index, dm)
-            defineStr += "float $c{0}_w = {1}.width / 2.0 * $c{0}_scaleFactor;\n".format(index, col)
-            defineStr += "float $c{0}_h = {1}.height / 2.0 * $c{0}_scaleFactor;\n".format(index, col)
-            defineStr += "float $c{0}_d = {1}.depth / 2.0 * $c{0}_scaleFactor;\n\n".format(index, col)
-        else:
-            defineStr += "float $c{0}_w = {1}.width / 2.0;\n".format(index, col)
-            defineStr += "float $c{0}_h = {1}.height / 2.0;\n".format(index, col)
-            defineStr += "float $c{0}_d = {1}.depth / 2.0;\n\n".format(index, col)
-
-        defineStr += "vector $c{0}_cp = <<0,0,0>>;\n".format(index)
-        defineStr += "float $c{0}_lx = 0;\n".format(index)
-        defineStr += "float $c{0}_ly = 0;\n".format(index)
-        defineStr += "float $c{0}_lz = 0;\n".format(index)
-        defineStr += "float $c{0}_min_l = 99999;\n".format(index)
-        defineStr += "int $c{0}_hit = 1;\n\n".format(index)
-
-        # detection
-        detectionStr += "\t$c{0}_cp = $p - $c{0};\n".format(index)
-        detectionStr += "\t$c{0}_lx = dot($c{0}_vx, $c{0}_cp);\n".format(index)
-        detectionStr += "\t$c{0}_ly = dot($c{0}_vy, $c{0}_cp);\n".format(index)
-        detectionStr += "\t$c{0}_lz = dot($c{0}_vz, $c{0}_cp);\n".format(index)
-        detectionStr += "\tif ($c{0}_lx != 0){{if (abs(($c{0}_w + $p_radius) / $c{0}_lx) < 1.0) {{$c{0}_hit = 0;}}}}\n".format(index)
-        detectionStr += "\tif ($c{0}_ly != 0){{if (abs(($c{0}_h + $p_radius) / $c{0}_ly) < 1.0) {{$c{0}_hit = 0;}}}}\n".format(index)
-        detectionStr += "\tif ($c{0}_lz != 0){{if (abs(($c{0}_d + $p_radius) / $c{0}_lz) < 1.0) {{$c{0}_hit = 0;}}}}\n".format(index)
-        detectionStr += "\n"
-        detectionStr += "\tif ($c{0}_hit) {{\n".format(index)
-        detectionStr += "\t\tif ($c{0}_lx != 0){{$c{0}_min_l = abs(($c{0}_w + $p_radius) / $c{0}_lx);}}\n".format(index)
-        detectionStr += "\t\tif ($c{0}_ly != 0){{$c{0}_min_l = min($c{0}_min_l, abs(($c{0}_h + $p_radius) / $c{0}_ly));}}\n".format(index)
-        detectionStr += "\t\tif ($c{0}_lz != 0){{$c{0}_min_l = min($c{0}_min_l, abs(($c{0}_d + $p_radius) / $c{0}_lz));}}\n".format(index)
-        detectionStr += "\t\tif ($c{0}_min_l == 99999){{\n".format(index)
-        detectionStr += "\t\t\t$p = $c{0} + <<$c{0}_w + $p_radius, 0, 0>>;\n".format(index)
-        detectionStr += "\t\t} else {\n"
-        detectionStr += "\t\t\t$p = $c{0} + ($c{0}_cp * $c{0}_min_l);\n".format(index)
-        detectionStr += "\t\t}\n"
-        detectionStr += "\t}\n\n"
-
-    return defineStr, detectionStr
+    return expstr.collision(col, index, colliderType, nodes, scalable=scalable, data=data, segment=segment)
 
 @undoWrapper
 def create_customnode(
@@ -494,8 +318,234 @@ def create_customnode(
     
     return detection_node, p_radius, output_vp
 
+def get_chain(root, *args):
+    """ get joint chain from root by following the first child
+
+    Args:
+        root (str): root joint.
+
+    Returns:
+        list: long names of joints, starting from root.
+    """
+    root = cmds.ls(root, l=True)[0]
+    descendants = cmds.listRelatives(root, ad=True, f=True, type=['joint', 'transform']) or []
+    constraints = set(cmds.ls(descendants, type='constraint', l=True) or [])
+
+    children = {}
+    for node in reversed(descendants):
+        if node in constraints:
+            continue
+        children.setdefault(node.rsplit('|', 1)[0], []).append(node)
+
+    chain = [root]
+    while chain[-1] in children:
+        chain.append(children[chain[-1]][0])
+
+    return chain
+
+@undoWrapper
+def setup_chains(
+        controller, 
+        root_joints, 
+        colliders=[], 
+        groundCol=False, 
+        scalable=False, 
+        tip_radius=False,
+        segment=False,
+        separation=False,
+        closed=False,
+        *args, 
+        **kwargs
+    ):
+    """ create parent/input/output transforms, aim constraints and detections for many joint-chains
+
+    X-axis of each joint must face the child.
+    World positions and rotations are queried at once, rotate orders are read for each joint. Helpers, constraints and detections are still created for each link.
+
+    Args:
+        controller (str): node to add control attributes.
+        root_joints (list): root joints of chains. Each chain follows the first child.
+        colliders (list, optional): list of colliders. Defaults to [].
+        groundCol (bool, optional): add horizontal plane collision. Defaults to False.
+        scalable (bool, optional): allow for parent scale of joint-chain and parent scale of colliders. Defaults to False.
+        tip_radius (bool, optional): interpolate radius and tip radius from root to tip of each chain. Defaults to False.
+        segment (bool, optional): detect each link as a capsule from parent to input (standard only). Defaults to False.
+        separation (bool, optional): keep corresponding links of neighbouring chains in root_joints order apart by Chain Separation (standard only). Defaults to False.
+        closed (bool, optional): the last chain and the first chain are also neighbours, e.g. skirt. Defaults to False.
+
+    Returns:
+        list: dict for each chain with joints, parents, inputs, outputs, detections, and build time in seconds (time, helper_time).
+    """
+    start = timeit.default_timer()
+    
+    chains = [get_chain(root) for root in root_joints]
+    
+    # bulk query of world transforms, rotate order is read for each joint
+    joints = [j for chain in chains for j in chain]
+    if not joints:
+        return []
+    pos = cmds.xform(joints, q=True, ws=True, t=True)
+    rot = cmds.xform(joints, q=True, ws=True, ro=True)
+    world = {}
+    for i, j in enumerate(joints):
+        world[j] = (pos[i*3:i*3+3], rot[i*3:i*3+3], cmds.getAttr(j + '.rotateOrder'))
+
+    query_time = timeit.default_timer() - start
+
+    results = []
+    for chain in chains:
+        chain_start = timeit.default_timer()
+        result = {'joints': chain, 'parents': [], 'inputs': [], 'outputs': [], 'detections': []}
+
+        # helper transforms
+        for a, b in zip(chain, chain[1:]):
+            p = a.rsplit('|', 1)[0] or None
+            name = a.rsplit('|', 1)[-1]
+            a_pos, a_rot, a_roo = world[a]
+            b_pos = world[b][0]
+
+            prt = cmds.createNode('transform', n='{}_parent'.format(name), p=p)
+            ipt = cmds.createNode('transform', n='{}_input'.format(name), p=p)
+            out = cmds.createNode('transform', n='{}_output'.format(name), p=p)
+            cmds.setAttr(prt + '.rotateOrder', a_roo) # world rotation is queried in rotate order of joint.
+            cmds.xform(prt, ws=True, t=a_pos, ro=a_rot) # parent is worldUpObject of aimConstraint, so rotation must also be aligned.
+            cmds.xform(ipt, ws=True, t=b_pos)
+            cmds.xform(out, ws=True, t=b_pos)
+
+            result['parents'].append(prt)
+            result['inputs'].append(ipt)
+            result['outputs'].append(out)
+
+        # aim constraints
+        for a, prt, out in zip(chain, result['parents'], result['outputs']):
+            cmds.aimConstraint(out, a, aim=[1,0,0], u=[0,0,1], wu=[0,0,1], wut='objectrotation', wuo=prt)
+
+        result['helper_time'] = timeit.default_timer() - chain_start
+        results.append(result)
+
+    # detections (after all helpers, so that inputs of neighbouring chains exist)
+    for c, result in enumerate(results):
+        chain_start = timeit.default_timer()
+
+        neighbor_chains = []
+        if separation:
+            for n in [c - 1, c + 1]:
+                if closed:
+                    n = n % len(results)
+                if n >= 0 and n < len(results) and n != c and not n in neighbor_chains:
+                    neighbor_chains.append(n)
+
+        links = len(result['inputs'])
+        for i, (prt, ipt, out) in enumerate(zip(result['parents'], result['inputs'], result['outputs'])):
+            radius_rate = None
+            if tip_radius:
+                radius_rate = float(i) / float(links - 1) if links > 1 else 0.0
+            neighbors = [results[n]['inputs'][i] for n in neighbor_chains if i < len(results[n]['inputs'])]
+            result['detections'].append(create(
+                ipt, 
+                out, 
+                controller, 
+                parent=prt, 
+                colliders=colliders, 
+                groundCol=groundCol, 
+                scalable=scalable, 
+                radius_rate=radius_rate, 
+                segment=segment, 
+                neighbors=neighbors
+            ))
+
+        result['time'] = result['helper_time'] + timeit.default_timer() - chain_start
+
+    total = timeit.default_timer() - start
+    print("Setup {} chains ({} links) in {:.3f} sec. (query : {:.3f} sec)".format(len(results), sum(len(r['inputs']) for r in results), total, query_time))
+    for r in results:
+        print("  {} : {} links, {:.3f} sec (helpers : {:.3f} sec)".format(r['joints'][0].rsplit('|', 1)[-1], len(r['inputs']), r['time'], r['helper_time']))
+
+    return results
+
+def get_expressions(*args):
+    """ find expressions created by expcol, by connections instead of names
+
+    Returns:
+        tuple: detection expressions (list) and data hub expressions (list).
+    """
+    exp_nodes = []
+    for exp in cmds.ls(type='expression') or []:
+        outputs = cmds.ls(cmds.listConnections(exp + '.output', s=False, d=True) or [], type='vectorProduct')
+        inputs = [plug for plug in cmds.listConnections(exp + '.input', s=True, d=False, p=True) or [] if plug.endswith('.colIteration')]
+        if outputs and inputs:
+            exp_nodes.append(exp)
+
+    hub_exp_nodes = []
+    for hub in cmds.ls(type='network') or []:
+        plugs = cmds.listConnections(hub + '.message', s=False, d=True, p=True) or []
+        if [plug for plug in plugs if plug.endswith('.hub')]:
+            hub_exp_nodes += cmds.listConnections(hub, s=True, d=False, type='expression') or []
+
+    return exp_nodes, list(set(hub_exp_nodes))
+
+@undoWrapper
+def publish(visualization=True, merge=True, *args, **kwargs):
+    """ optimize scene for animation handoff
+
+    Args:
+        visualization (bool, optional): delete implicitSphere nodes for radius visualization and remove their writes from expressions. Defaults to True.
+        merge (bool, optional): merge duplicate decomposeMatrix and vectorProduct nodes read by detections and data hubs. Defaults to True.
+
+    Returns:
+        dict: Number of eliminated nodes for each category and total.
+    """
+    result = {'visualization': 0, 'decomposeMatrix': 0, 'vectorProduct': 0}
+
+    exp_nodes, hub_exp_nodes = get_expressions()
+    detection_nodes = exp_nodes + (cmds.ls(type='colDetectionMtxNode') or [])
+
+    if visualization:
+        p_radius_list = []
+        for node in detection_nodes:
+            for vp in cmds.ls(cmds.listConnections(node, s=False, d=True) or [], type='vectorProduct'):
+                for output in cmds.listConnections(vp + '.output', s=False, d=True) or []:
+                    for child in cmds.listRelatives(output, c=True, type='transform', f=True) or []:
+                        if cmds.listRelatives(child, s=True, type='implicitSphere'):
+                            p_radius_list.append(child)
+        p_radius_list = list(set(p_radius_list))
+
+        # remove scale writes from expressions
+        for exp in exp_nodes:
+            lines = cmds.expression(exp, q=True, s=True).split('\n')
+            new_lines = []
+            for line in lines:
+                m = re.match(r'\s*([^\s=]+)\.scale[XYZ]\s*=', line)
+                if m and cmds.ls(m.group(1), l=True) and cmds.ls(m.group(1), l=True)[0] in p_radius_list:
+                    continue
+                new_lines.append(line)
+            if len(new_lines) != len(lines):
+                cmds.expression(exp, e=True, s='\n'.join(new_lines))
+
+        if p_radius_list:
+            result['visualization'] = len(p_radius_list) + len(cmds.listRelatives(p_radius_list, ad=True) or [])
+            cmds.delete(p_radius_list)
+
+    if merge:
+        # only helper nodes read by expcol, nodes of other rigs are not merged.
+        helpers = []
+        for node in detection_nodes + hub_exp_nodes:
+            helpers += cmds.listConnections(node, s=True, d=False) or []
+        helpers = list(set(helpers))
+        result['decomposeMatrix'] = mergeDuplicateNodes('decomposeMatrix', nodes=helpers)
+        result['vectorProduct'] = mergeDuplicateNodes('vectorProduct', nodes=helpers)
+
+    result['total'] = sum(result.values())
+
+    print("Published : {} nodes eliminated.".format(result['total']))
+    print("  visualization   : {}".format(result['visualization']))
+    print("  decomposeMatrix : {}".format(result['decomposeMatrix']))
+    print("  vectorProduct   : {}".format(result['vectorProduct']))
+
+    return result
+
 @undoWrapper
-def add_control_attr_standard(ctrl, groundCol=False, tip_radius=False, *args, **kwargs):
+def add_control_attr_standard(ctrl, groundCol=False, tip_radius=False, separation=False, *args, **kwargs):
     if not cmds.attributeQuery('collision', node=ctrl, ex=True):
         cmds.addAttr(ctrl, ln='collision', nn='__________', at='enum', en='Collision', k=True)
     if not cmds.attributeQuery('colIteration', node=ctrl, ex=True):
@@ -508,6 +558,9 @@ def add_control_attr_standard(ctrl, groundCol=False, tip_radius=False, *args, **
     if groundCol:
         if not cmds.attributeQuery('groundHeight', node=ctrl, ex=True):
             cmds.addAttr(ctrl, ln="groundHeight", nn='Ground Height', at='double', dv=0, k=True)
+    if separation:
+        if not cmds.attributeQuery('chainSeparation', node=ctrl, ex=True):
+            cmds.addAttr(ctrl, ln="chainSeparation", nn='Chain Separation', at='double', min=0, dv=1, k=True)
 
 @undoWrapper
 def add_control_attr_customnode(ctrl, tip_radius=False, *args, **kwargs):
@@ -0,0 +1,667 @@
+# -*- coding: utf-8 -*-
+"""
+    Expression strings of detections.
+
+    This module does not depend on Maya. Node names are passed in,
+    so the expressions can also be generated and evaluated headlessly (see expcol.mel).
+"""
+from . import sdf
+
+def detection(
+        controller, 
+        input_dm, 
+        output_vp, 
+        colliderExpStr, 
+        p_radius=None, 
+        parent_dm=None, 
+        scale_dm=None, 
+        groundCol=False, 
+        scalable=False, 
+        radius_rate=None, 
+        distance=None, 
+        segment=False, 
+        neighbors=None, 
+        *args
+    ):
+    """ create expression string of detection
+
+    Args:
+        controller (str): node with control attributes.
+        input_dm (str): decomposeMatrix of input.
+        output_vp (str): vectorProduct connected to output.
+        colliderExpStr (list): list of define string and detection string created by collision().
+        p_radius (str, optional): implicitSphere transform for radius visualization. Defaults to None.
+        parent_dm (str, optional): decomposeMatrix of parent. Defaults to None.
+        scale_dm (str, optional): decomposeMatrix used for scale of joint-chain. Defaults to None.
+        groundCol (bool, optional): add horizontal plane collision. Defaults to False.
+        scalable (bool, optional): allow for parent scale of joint-chain. Ignored if scale_dm is None. Defaults to False.
+        radius_rate (float, optional): rate at which radius and tip radius are interpolated, between 0 and 1. Defaults to None.
+        distance (float, optional): length between parent and input, used if not scalable. Defaults to None.
+        segment (bool, optional): colliderExpStr was created with segment=True. Ignored if parent_dm is None. Defaults to False.
+        neighbors (list, optional): decomposeMatrix of inputs of corresponding links of neighbouring chains. 
+            The point is kept at half of chainSeparation of controller from the midpoint of both inputs. Defaults to None.
+
+    Returns:
+        str: expression string.
+    """
+    use_tip_radius = not radius_rate is None
+    if not scale_dm:
+        scalable = False
+
+    expStr = ""
+    
+    if parent_dm:
+        expStr += "vector $p0 = <<{0}.outputTranslateX, {0}.outputTranslateY, {0}.outputTranslateZ>>;\n\n".format(parent_dm)
+    
+    expStr += "vector $p = <<{0}.outputTranslateX, {0}.outputTranslateY, {0}.outputTranslateZ>>;\n".format(input_dm)
+
+    if scalable:
+        expStr += "float $p_scaleFactor = abs({0}.outputScaleZ);\n".format(scale_dm)
+        if use_tip_radius:
+            if radius_rate == 0.0:
+                expStr += "float $p_radius = {0}.radius * $p_scaleFactor;\n".format(controller)
+            elif radius_rate == 1.0:
+                expStr += "float $p_radius = {0}.tipRadius * $p_scaleFactor;\n".format(controller)
+            else:
+                expStr += "float $p_radius = ({0}.radius*{1} + {0}.tipRadius*{2}) * $p_scaleFactor;\n".format(controller, 1.0-radius_rate, radius_rate)
+        else:
+            expStr += "float $p_radius = {0}.radius * $p_scaleFactor;\n".format(controller)
+        if parent_dm:
+            expStr += "float $d = mag($p - $p0);\n\n"
+    else:
+        if use_tip_radius:
+            if radius_rate == 0.0:
+                expStr += "float $p_radius = {0}.radius;\n".format(controller)
+            elif radius_rate == 1.0:
+                expStr += "float $p_radius = {0}.tipRadius;\n".format(controller)
+            else:
+                expStr += "float $p_radius = {0}.radius*{1} + {0}.tipRadius*{2};\n".format(controller, 1.0-radius_rate, radius_rate)
+        else:
+            expStr += "float $p_radius = {0}.radius;\n".format(controller)
+        if parent_dm:
+            expStr += "float $d = {};\n\n".format(distance)
+
+    if parent_dm and segment:
+        expStr += "//segment\n"
+        expStr += "vector $seg = <<0,0,0>>;\n"
+        expStr += "vector $sq = <<0,0,0>>;\n"
+        expStr += "float $st = 0;\n\n"
+
+    if neighbors:
+        expStr += "//separation\n"
+        # half of separation from the midpoint of both inputs, so both sides end at separation.
+        if scalable:
+            expStr += "float $sep = {}.chainSeparation * 0.5 * $p_scaleFactor;\n".format(controller)
+        else:
+            expStr += "float $sep = {}.chainSeparation * 0.5;\n".format(controller)
+        for n, dm in enumerate(neighbors):
+            expStr += "vector $n{0} = ($p + <<{1}.outputTranslateX, {1}.outputTranslateY, {1}.outputTranslateZ>>) * 0.5;\n".format(n, dm)
+        expStr += "vector $nv = <<0,0,0>>;\n\n"
+    
+    # collider define
+    for cs in colliderExpStr:
+        expStr += cs[0]
+    
+    # ground height
+    if groundCol:
+        expStr += "//ground\n"
+        expStr += "float $groundHeight = {}.groundHeight;\n\n".format(controller)
+    
+    # collision iteration
+    expStr += "//collision iteration\n"
+    expStr += "for($i = 0; $i < {}.colIteration; $i++)\n".format(controller)
+    expStr += "{\n"
+
+    for cs in colliderExpStr:
+        expStr += cs[1]
+
+    if neighbors:
+        # midpoints are fixed, so the push does not accumulate over iterations.
+        expStr += "\t//separation\n"
+        for n in range(len(neighbors)):
+            expStr += "\t$nv = $p - $n{};\n".format(n)
+            expStr += "\tif (mag($nv) < $sep && mag($nv) > 0)\n"
+            expStr += "\t\t$p = $n{} + (unit($nv) * $sep);\n".format(n)
+        expStr += "\n"
+
+    if groundCol:
+        expStr += "\t//ground\n"
+        expStr += "\tif($p.y < ($groundHeight + $p_radius))\n"
+        expStr += "\t{\n"
+        expStr += "\t\t$p = <<$p.x, ($groundHeight + $p_radius), $p.z>>;\n"
+        expStr += "\t}\n\n"
+
+    if parent_dm:
+        expStr += "\t//keep length\n"
+        expStr += "\t$p = $p0 + (unit($p - $p0) * $d);\n"
+
+    expStr += "}\n\n"
+
+    # output
+    expStr += "{}.input1X = $p.x;\n".format(output_vp)
+    expStr += "{}.input1Y = $p.y;\n".format(output_vp)
+    expStr += "{}.input1Z = $p.z;\n".format(output_vp)
+
+    if p_radius:
+        if scalable:
+            expStr += "{}.scaleX = $p_radius / $p_scaleFactor;\n".format(p_radius)
+            expStr += "{}.scaleY = $p_radius / $p_scaleFactor;\n".format(p_radius)
+            expStr += "{}.scaleZ = $p_radius / $p_scaleFactor;\n".format(p_radius)
+        else:
+            expStr += "{}.scaleX = $p_radius;\n".format(p_radius)
+            expStr += "{}.scaleY = $p_radius;\n".format(p_radius)
+            expStr += "{}.scaleZ = $p_radius;\n".format(p_radius)
+
+    return expStr
+
+def frame(index, nodes, *args):
+    """ define string of center and unit vectors of collider (cuboid, heightfield and sdf)
+    """
+    hub = nodes.get('hub')
+    if hub:
+        defineStr = "vector $c{0} = <<{1}.centerX, {1}.centerY, {1}.centerZ>>;\n".format(index, hub)
+        defineStr += "vector $c{0}_vx = <<{1}.vxX, {1}.vxY, {1}.vxZ>>;\n".format(index, hub)
+        defineStr += "vector $c{0}_vy = <<{1}.vyX, {1}.vyY, {1}.vyZ>>;\n".format(index, hub)
+        defineStr += "vector $c{0}_vz = <<{1}.vzX, {1}.vzY, {1}.vzZ>>;\n".format(index, hub)
+    else:
+        defineStr = "vector $c{0} = <<{1}.outputTranslateX, {1}.outputTranslateY, {1}.outputTranslateZ>>;\n".format(index, nodes['dm'])
+        defineStr += "vector $c{0}_vx = <<{1}.outputX, {1}.outputY, {1}.outputZ>>;\n".format(index, nodes['vp_x'])
+        defineStr += "vector $c{0}_vy = <<{1}.outputX, {1}.outputY, {1}.outputZ>>;\n".format(index, nodes['vp_y'])
+        defineStr += "vector $c{0}_vz = <<{1}.outputX, {1}.outputY, {1}.outputZ>>;\n".format(index, nodes['vp_z'])
+    return defineStr
+
+def segmentCapsule(index, radius, *args):
+    """ detection string of link (segment from $p0 to $p) against capsule axis, using closest points of two segments
+
+    Args:
+        index (int): collider index in expression.
+        radius (str): expression of capsule radius at $c{index}_t.
+
+    Returns:
+        str: detection string.
+    """
+    detectionStr = "\t$seg = $p - $p0;\n"
+    detectionStr += "\tvector $c{0}_ba = $c{0}b - $c{0}a;\n".format(index)
+    detectionStr += "\tfloat $c{0}_ss = dot($seg, $seg);\n".format(index)
+    detectionStr += "\tfloat $c{0}_sb = dot($seg, $c{0}_ba);\n".format(index)
+    detectionStr += "\tfloat $c{0}_sr = dot($seg, $p0 - $c{0}a);\n".format(index)
+    detectionStr += "\tfloat $c{0}_bb = dot($c{0}_ba, $c{0}_ba);\n".format(index)
+    detectionStr += "\tfloat $c{0}_br = dot($c{0}_ba, $p0 - $c{0}a);\n".format(index)
+    detectionStr += "\tfloat $c{0}_denom = $c{0}_ss * $c{0}_bb - $c{0}_sb * $c{0}_sb;\n".format(index)
+    detectionStr += "\t$st = 1;\n"
+    detectionStr += "\tif ($c{0}_denom > 0)\n".format(index)
+    detectionStr += "\t\t$st = clamp(0, 1, ($c{0}_sb * $c{0}_br - $c{0}_sr * $c{0}_bb) / $c{0}_denom);\n".format(index)
+    detectionStr += "\tfloat $c{0}_t = ($c{0}_sb * $st + $c{0}_br) / $c{0}_bb;\n".format(index)
+    detectionStr += "\tif ($c{0}_t < 0)\n".format(index)
+    detectionStr += "\t{\n"
+    detectionStr += "\t\t$c{0}_t = 0;\n".format(index)
+    detectionStr += "\t\t$st = clamp(0, 1, -$c{0}_sr / $c{0}_ss);\n".format(index)
+    detectionStr += "\t}\n"
+    detectionStr += "\telse if ($c{0}_t > 1)\n".format(index)
+    detectionStr += "\t{\n"
+    detectionStr += "\t\t$c{0}_t = 1;\n".format(index)
+    detectionStr += "\t\t$st = clamp(0, 1, ($c{0}_sb - $c{0}_sr) / $c{0}_ss);\n".format(index)
+    detectionStr += "\t}\n"
+    detectionStr += "\t$sq = $p0 + ($seg * $st);\n"
+    detectionStr += "\tvector $c{0}_q = $c{0}a + ($c{0}_ba * $c{0}_t);\n".format(index)
+    detectionStr += "\tfloat $c{0}_r = {1};\n".format(index, radius)
+    detectionStr += "\tif ($st > 0 && dot($sq-$c{0}_q, $sq-$c{0}_q) < ($c{0}_r + $p_radius) * ($c{0}_r + $p_radius))\n".format(index)
+    detectionStr += "\t{\n"
+    detectionStr += "\t\t$sq = $c{0}_q + (unit($sq - $c{0}_q) * ($c{0}_r + $p_radius));\n".format(index)
+    detectionStr += "\t\t$p = $p0 + (unit($sq - $p0) * mag($seg));\n"
+    detectionStr += "\t}\n\n"
+    return detectionStr
+
+HUB_ATTRS = {
+    'sphere': (['center'], ['scaleFactor', 'scaledRadius']),
+    'infinitePlane': (['center', 'normal'], ['scaleFactor']),
+    'capsule': (['a', 'b', 'axis'], ['scaleFactor', 'length', 'scaledRadius']),
+    'capsule2': (['a', 'b', 'axis'], ['scaleFactor', 'length', 'scaledRadiusA', 'scaledRadiusB']),
+    'cuboid': (['center', 'vx', 'vy', 'vz'], ['scaleFactor', 'halfWidth', 'halfHeight', 'halfDepth', 'scaledHalfWidth', 'scaledHalfHeight', 'scaledHalfDepth']),
+    'heightfield': (['center', 'vx', 'vy', 'vz'], ['scaleFactor', 'halfWidth', 'halfDepth', 'scaledHalfWidth', 'scaledHalfDepth']),
+    'sdf': (['center', 'vx', 'vy', 'vz'], ['scaleFactor']),
+}
+
+def hub(col, colliderType, nodes, hub, *args):
+    """ create expression string of data hub, which computes derived world-space values of collider once
+
+    Args:
+        col (str): collider name.
+        colliderType (str): collider type.
+        nodes (dict): helper node names (dm, dmA, dmB, vp_x, vp_y, vp_z) used by the collider type.
+        hub (str): node to write values. Attributes are listed in HUB_ATTRS.
+
+    Returns:
+        str: expression string.
+    """
+    vectors, floats = HUB_ATTRS[colliderType]
+    expStr = "//{}\n".format(col)
+
+    if colliderType in ['capsule', 'capsule2']:
+        expStr += "vector $a = <<{0}.outputTranslateX, {0}.outputTranslateY, {0}.outputTranslateZ>>;\n".format(nodes['dmA'])
+        expStr += "vector $b = <<{0}.outputTranslateX, {0}.outputTranslateY, {0}.outputTranslateZ>>;\n".format(nodes['dmB'])
+        expStr += "float $scaleFactor = {}.outputScaleZ;\n".format(nodes['dmA'])
+        expStr += "float $length = mag($b-$a);\n"
+        expStr += "vector $axis = unit($b-$a);\n"
+        if colliderType == 'capsule':
+            expStr += "float $scaledRadius = {}.radius * $scaleFactor;\n".format(col)
+        else:
+            expStr += "float $scaledRadiusA = {}.radiusA * $scaleFactor;\n".format(col)
+            expStr += "float $scaledRadiusB = {}.radiusB * $scaleFactor;\n".format(col)
+    else:
+        expStr += "vector $center = <<{0}.outputTranslateX, {0}.outputTranslateY, {0}.outputTranslateZ>>;\n".format(nodes['dm'])
+        expStr += "float $scaleFactor = {}.outputScaleZ;\n".format(nodes['dm'])
+        if colliderType == 'infinitePlane':
+            expStr += "vector $normal = <<{0}.outputX, {0}.outputY, {0}.outputZ>>;\n".format(nodes['vp_y'])
+        for v in ['vx', 'vy', 'vz']:
+            if v in vectors:
+                expStr += "vector ${0} = <<{1}.outputX, {1}.outputY, {1}.outputZ>>;\n".format(v, nodes['vp_' + v[1]])
+        if colliderType == 'sphere':
+            expStr += "float $scaledRadius = {}.radius * $scaleFactor;\n".format(col)
+        for at in ['Width', 'Height', 'Depth']:
+            if 'half' + at in floats:
+                expStr += "float $half{0} = {1}.{2} / 2.0;\n".format(at, col, at.lower())
+                expStr += "float $scaledHalf{0} = $half{0} * $scaleFactor;\n".format(at)
+
+    expStr += "\n"
+    for v in vectors:
+        expStr += "{0}.{1}X = ${1}.x;\n".format(hub, v)
+        expStr += "{0}.{1}Y = ${1}.y;\n".format(hub, v)
+        expStr += "{0}.{1}Z = ${1}.z;\n".format(hub, v)
+    for f in floats:
+        expStr += "{0}.{1} = ${1};\n".format(hub, f)
+
+    return expStr
+
+def collision(col, index, colliderType, nodes, scalable=False, data=None, segment=False, *args):
+    """ create expression string of collider
+
+    Args:
+        col (str): collider name.
+        index (int): collider index in expression.
+        colliderType (str): collider type.
+        nodes (dict): helper node names (dm, dmA, dmB, vp_x, vp_y, vp_z) used by the collider type, or data hub of the collider (hub).
+        scalable (bool, optional): allow for parent scale of colliders. Defaults to False.
+        data (dict, optional): baked values of heightfield (resolutionU, resolutionV) and sdf (resolution, cellSize, distances). Defaults to None.
+        segment (bool, optional): detect the link from $p0 to $p instead of the point $p, and rotate the link about $p0. 
+            Used for sphere, capsule, capsule2 and cuboid. Other types detect the tip point. Defaults to False.
+
+    Returns:
+        tuple: define string and detection string.
+    """
+    defineStr = "//{}\n".format(col)
+    detectionStr = "\t//{}\n".format(col)
+    hub = nodes.get('hub')
+
+    if colliderType == 'sphere':
+        if hub:
+            defineStr += "vector $c{0} = <<{1}.centerX, {1}.centerY, {1}.centerZ>>;\n".format(index, hub)
+            if scalable:
+                defineStr += "float $c{0}_radius = {1}.scaledRadius;\n\n".format(index, hub)
+            else:
+                defineStr += "float $c{0}_radius = {1}.radius;\n\n".format(index, col)
+        else:
+            dm = nodes['dm']
+
+            defineStr += "vector $c{0} = <<{1}.outputTranslateX, {1}.outputTranslateY, {1}.outputTranslateZ>>;\n".format(index, dm)
+            if scalable:
+                defineStr += "float $c{0}_scaleFactor = {1}.outputScaleZ;\n".format(index, dm)
+                defineStr += "float $c{0}_radius = {1}.radius * $c{0}_scaleFactor;\n\n".format(index, col)
+            else:
+                defineStr += "float $c{0}_radius = {1}.radius;\n\n".format(index, col)
+
+        if segment:
+            detectionStr += "\t$seg = $p - $p0;\n"
+            detectionStr += "\t$st = clamp(0, 1, dot($c{0} - $p0, $seg) / dot($seg, $seg));\n".format(index)
+            detectionStr += "\t$sq = $p0 + ($seg * $st);\n"
+            detectionStr += "\tif ($st > 0 && ($c{0}_radius+$p_radius) * ($c{0}_radius+$p_radius) > dot($sq-$c{0}, $sq-$c{0}))\n".format(index)
+            detectionStr += "\t{\n"
+            detectionStr += "\t\t$sq = $c{0} + (unit($sq - $c{0}) * ($c{0}_radius + $p_radius));\n".format(index)
+            detectionStr += "\t\t$p = $p0 + (unit($sq - $p0) * mag($seg));\n"
+            detectionStr += "\t}\n\n"
+        else:
+            detectionStr += "\tif (($c{0}_radius+$p_radius) * ($c{0}_radius+$p_radius) > dot($p-$c{0}, $p-$c{0}))\n".format(index)
+            detectionStr += "\t{\n"
+            detectionStr += "\t\t$p = $c{0} + (unit($p - $c{0}) * ($c{0}_radius + $p_radius));\n".format(index)
+            detectionStr += "\t}\n\n"
+
+    elif colliderType == 'infinitePlane':
+        if hub:
+            defineStr += "vector $c{0} = <<{1}.centerX, {1}.centerY, {1}.centerZ>>;\n".format(index, hub)
+            defineStr += "vector $c{0}_normal = <<{1}.normalX, {1}.normalY, {1}.normalZ>>;\n\n".format(index, hub)
+        else:
+            dm = nodes['dm']
+            vp = nodes['vp_y']
+
+            defineStr += "vector $c{0} = <<{1}.outputTranslateX, {1}.outputTranslateY, {1}.outputTranslateZ>>;\n".format(index, dm)
+            defineStr += "vector $c{0}_normal = <<{1}.outputX, {1}.outputY, {1}.outputZ>>;\n\n".format(index, vp)
+
+        detectionStr += "\t$distancePointPlane = dot($c{0}_normal, ($p - $c{0}));\n".format(index)
+        detectionStr += "\tif($distancePointPlane - $p_radius < 0)\n"
+        detectionStr += "\t{\n"
+        detectionStr += "\t\t$p = $p - ($c{0}_normal * ($distancePointPlane - $p_radius));\n".format(index)
+        detectionStr += "\t}\n\n"
+
+    elif colliderType == 'capsule':
+        if hub:
+            defineStr += "vector $c{0}a = <<{1}.aX, {1}.aY, {1}.aZ>>;\n".format(index, hub)
+            defineStr += "vector $c{0}b = <<{1}.bX, {1}.bY, {1}.bZ>>;\n".format(index, hub)
+            if scalable:
+                defineStr += "float $c{0}_radius = {1}.scaledRadius;\n".format(index, hub)
+            else:
+                defineStr += "float $c{0}_radius = {1}.radius;\n".format(index, col)
+            defineStr += "float $c{0}_height = {1}.length;\n".format(index, hub)
+            defineStr += "vector $c{0}ab = <<{1}.axisX, {1}.axisY, {1}.axisZ>>;\n\n".format(index, hub)
+        else:
+            dmA = nodes['dmA']
+            dmB = nodes['dmB']
+
+            defineStr += "vector $c{0}a = <<{1}.outputTranslateX, {1}.outputTranslateY, {1}.outputTranslateZ>>;\n".format(index, dmA)
+            defineStr += "vector $c{0}b = <<{1}.outputTranslateX, {1}.outputTranslateY, {1}.outputTranslateZ>>;\n".format(index, dmB)
+            if scalable:
+                defineStr += "float $c{0}_scaleFactor = {1}.outputScaleZ;\n".format(index, dmA)
+                defineStr += "float $c{0}_radius = {1}.radius * $c{0}_scaleFactor;\n".format(index, col)
+            else:
+                defineStr += "float $c{0}_radius = {1}.radius;\n".format(index, col)
+            defineStr += "float $c{0}_height = mag($c{0}b-$c{0}a);\n".format(index)
+            defineStr += "vector $c{0}ab = unit($c{0}b-$c{0}a);\n\n".format(index)
+
+        if segment:
+            detectionStr += segmentCapsule(index, "$c{0}_radius".format(index))
+        else:
+            detectionStr += "\tfloat $t{0} = dot($c{0}ab,($p-$c{0}a));\n".format(index)
+            detectionStr += "\tfloat $sq_rad_sum{0} = ($c{0}_radius + $p_radius) * ($c{0}_radius + $p_radius);\n".format(index)
+            detectionStr += "\tif($t{0}/$c{0}_height <= 0)\n".format(index)
+            detectionStr += "\t{\n"
+            detectionStr += "\t\tif(dot($p-$c{0}a, $p-$c{0}a) < $sq_rad_sum{0})\n".format(index)
+            detectionStr += "\t\t\t$p = $c{0}a + (unit($p-$c{0}a) * ($c{0}_radius + $p_radius));\n".format(index)
+            detectionStr += "\t}\n"
+            detectionStr += "\telse if($t{0}/$c{0}_height >= 1)\n".format(index)
+            detectionStr += "\t{\n"
+            detectionStr += "\t\tif(dot($p-$c{0}b, $p-$c{0}b) < $sq_rad_sum{0})\n".format(index)
+            detectionStr += "\t\t\t$p = $c{0}b + (unit($p-$c{0}b) * ($c{0}_radius + $p_radius));\n".format(index)
+            detectionStr += "\t}\n"
+            detectionStr += "\telse\n"
+            detectionStr += "\t{\n"
+            detectionStr += "\t\tvector $q = $c{0}a + ($c{0}ab * $t{0});\n".format(index)
+            detectionStr += "\t\tif(dot($p-$q, $p-$q) < $sq_rad_sum{0})\n".format(index)
+            detectionStr += "\t\t\t$p = $q + (unit($p-$q) * ($c{0}_radius + $p_radius));\n".format(index)
+            detectionStr += "\t}\n\n"
+
+    elif colliderType == 'capsule2':
+        if hub:
+            defineStr += "vector $c{0}a = <<{1}.aX, {1}.aY, {1}.aZ>>;\n".format(index, hub)
+            defineStr += "vector $c{0}b = <<{1}.bX, {1}.bY, {1}.bZ>>;\n".format(index, hub)
+            if scalable:
+                defineStr += "float $c{0}a_radius = {1}.scaledRadiusA;\n".format(index, hub)
+                defineStr += "float $c{0}b_radius = {1}.scaledRadiusB;\n".format(index, hub)
+            else:
+                defineStr += "float $c{0}a_radius = {1}.radiusA;\n".format(index, col)
+                defineStr += "float $c{0}b_radius = {1}.radiusB;\n".format(index, col)
+            defineStr += "float $c{0}_height = {1}.length;\n".format(index, hub)
+            defineStr += "vector $c{0}ab = <<{1}.axisX, {1}.axisY, {1}.axisZ>>;\n\n".format(index, hub)
+        else:
+            dmA = nodes['dmA']
+            dmB = nodes['dmB']
+
+            defineStr += "vector $c{0}a = <<{1}.outputTranslateX, {1}.outputTranslateY, {1}.outputTranslateZ>>;\n".format(index, dmA)
+            defineStr += "vector $c{0}b = <<{1}.outputTranslateX, {1}.outputTranslateY, {1}.outputTranslateZ>>;\n".format(index, dmB)
+            if scalable:
+                defineStr += "float $c{0}_scaleFactor = {1}.outputScaleZ;\n".format(index, dmA)
+                defineStr += "float $c{0}a_radius = {1}.radiusA * $c{0}_scaleFactor;\n".format(index, col)
+                defineStr += "float $c{0}b_radius = {1}.radiusB * $c{0}_scaleFactor;\n".format(index, col)
+            else:
+                defineStr += "float $c{0}a_radius = {1}.radiusA;\n".format(index, col)
+                defineStr += "float $c{0}b_radius = {1}.radiusB;\n".format(index, col)
+            defineStr += "float $c{0}_height = mag($c{0}b-$c{0}a);\n".format(index)
+            defineStr += "vector $c{0}ab = unit($c{0}b-$c{0}a);\n\n".format(index)
+
+        if segment:
+            detectionStr += segmentCapsule(index, "($c{0}a_radius * (1.0 - $c{0}_t) + $c{0}b_radius * $c{0}_t)".format(index))
+        else:
+            detectionStr += "\tfloat $t{0} = dot($c{0}ab,($p-$c{0}a));\n".format(index)
+            detectionStr += "\tfloat $ratio{0} = $t{0}/$c{0}_height;\n".format(index)
+            detectionStr += "\tif($ratio{0} <= 0)\n".format(index)
+            detectionStr += "\t{\n"
+            detectionStr += "\t\tif(dot($p-$c{0}a, $p-$c{0}a) < ($c{0}a_radius + $p_radius) * ($c{0}a_radius + $p_radius))\n".format(index)
+            detectionStr += "\t\t\t$p = $c{0}a + (unit($p-$c{0}a) * ($c{0}a_radius + $p_radius));\n".format(index)
+            detectionStr += "\t}\n"
+            detectionStr += "\telse if($ratio{0} >= 1)\n".format(index)
+            detectionStr += "\t{\n"
+            detectionStr += "\t\tif(dot($p-$c{0}b, $p-$c{0}b) < ($c{0}b_radius + $p_radius) * ($c{0}b_radius + $p_radius))\n".format(index)
+            detectionStr += "\t\t\t$p = $c{0}b + (unit($p-$c{0}b) * ($c{0}b_radius + $p_radius));\n".format(index)
+            detectionStr += "\t}\n"
+            detectionStr += "\telse\n"
+            detectionStr += "\t{\n"
+            detectionStr += "\t\tvector $q = $c{0}a + ($c{0}ab * $t{0});\n".format(index)
+            detectionStr += "\t\tfloat $r = $c{0}a_radius * (1.0 - $ratio{0}) + $c{0}b_radius * $ratio{0};\n".format(index)
+            detectionStr += "\t\tif(dot($p-$q, $p-$q) < ($r + $p_radius) * ($r + $p_radius))\n".format(index)
+            detectionStr += "\t\t\t$p = $q + (unit($p-$q) * ($r + $p_radius));\n".format(index)
+            detectionStr += "\t}\n\n"
+    
+    elif colliderType == 'cuboid':
+        dm = nodes.get('dm')
+
+        # define
+        defineStr += frame(index, nodes)
+        if hub:
+            if scalable:
+                defineStr += "float $c{0}_w = {1}.scaledHalfWidth;\n".format(index, hub)
+                defineStr += "float $c{0}_h = {1}.scaledHalfHeight;\n".format(index, hub)
+                defineStr += "float $c{0}_d = {1}.scaledHalfDepth;\n\n".format(index, hub)
+            else:
+                defineStr += "float $c{0}_w = {1}.halfWidth;\n".format(index, hub)
+                defineStr += "float $c{0}_h = {1}.halfHeight;\n".format(index, hub)
+                defineStr += "float $c{0}_d = {1}.halfDepth;\n\n".format(index, hub)
+        elif scalable:
+            defineStr += "float $c{0}_scaleFactor = {1}.outputScaleZ;\n".format(index, dm)
+            defineStr += "float $c{0}_w = {1}.width / 2.0 * $c{0}_scaleFactor;\n".format(index, col)
+            defineStr += "float $c{0}_h = {1}.height / 2.0 * $c{0}_scaleFactor;\n".format(index, col)
+            defineStr += "float $c{0}_d = {1}.depth / 2.0 * $c{0}_scaleFactor;\n\n".format(index, col)
+        else:
+            defineStr += "float $c{0}_w = {1}.width / 2.0;\n".format(index, col)
+            defineStr += "float $c{0}_h = {1}.height / 2.0;\n".format(index, col)
+            defineStr += "float $c{0}_d = {1}.depth / 2.0;\n\n".format(index, col)
+
+        defineStr += "vector $c{0}_cp = <<0,0,0>>;\n".format(index)
+        defineStr += "float $c{0}_lx = 0;\n".format(index)
+        defineStr += "float $c{0}_ly = 0;\n".format(index)
+        defineStr += "float $c{0}_lz = 0;\n".format(index)
+        defineStr += "float $c{0}_min_l = 99999;\n".format(index)
+        defineStr += "int $c{0}_hit = 1;\n\n".format(index)
+
+        # detection
+        if segment:
+            # clip the link by slabs of the box expanded by radius, and rotate the link about $p0 out of the box
+            detectionStr += "\t$seg = $p - $p0;\n"
+            detectionStr += "\t$c{0}_cp = $p0 - $c{0};\n".format(index)
+            detectionStr += "\tfloat $c{0}_t0 = 0;\n".format(index)
+            detectionStr += "\tfloat $c{0}_t1 = 1;\n".format(index)
+            for axis, half in [('x', 'w'), ('y', 'h'), ('z', 'd')]:
+                detectionStr += "\t$c{0}_l{1} = dot($c{0}_v{1}, $c{0}_cp);\n".format(index, axis)
+                detectionStr += "\tfloat $c{0}_s{1} = dot($c{0}_v{1}, $seg);\n".format(index, axis)
+                detectionStr += "\tif (abs($c{0}_s{1}) > 0.000001)\n".format(index, axis)
+                detectionStr += "\t{\n"
+                detectionStr += "\t\tfloat $c{0}_ta = (-($c{0}_{2} + $p_radius) - $c{0}_l{1}) / $c{0}_s{1};\n".format(index, axis, half)
+                detectionStr += "\t\tfloat $c{0}_tb = (($c{0}_{2} + $p_radius) - $c{0}_l{1}) / $c{0}_s{1};\n".format(index, axis, half)
+                detectionStr += "\t\t$c{0}_t0 = max($c{0}_t0, min($c{0}_ta, $c{0}_tb));\n".format(index)
+                detectionStr += "\t\t$c{0}_t1 = min($c{0}_t1, max($c{0}_ta, $c{0}_tb));\n".format(index)
+                detectionStr += "\t}\n"
+                detectionStr += "\telse if (abs($c{0}_l{1}) >= $c{0}_{2} + $p_radius)\n".format(index, axis, half)
+                detectionStr += "\t\t$c{0}_t1 = -1;\n".format(index)
+            detectionStr += "\t$st = ($c{0}_t0 + $c{0}_t1) * 0.5;\n".format(index)
+            detectionStr += "\tif ($c{0}_t0 <= $c{0}_t1 && $st > 0)\n".format(index)
+            detectionStr += "\t{\n"
+            # push perpendicular to the link. for each axis, the angle to clear its slab is estimated by depth / distance from $p0
+            # at both ends of the clipped range and where the link crosses the center plane, divided by the length of the axis
+            # perpendicular to the link. the deepest point of the axis with the smallest angle is pushed out, + on the center plane.
+            detectionStr += "\t\tvector $c{0}_u = unit($seg);\n".format(index)
+            detectionStr += "\t\tfloat $c{0}_ts = max($c{0}_t0, $st * 0.5);\n".format(index)
+            detectionStr += "\t\tfloat $c{0}_e = 0;\n".format(index)
+            detectionStr += "\t\tfloat $c{0}_best = 99999;\n".format(index)
+            detectionStr += "\t\tvector $c{0}_push = <<0,0,0>>;\n".format(index)
+            for axis, half in [('x', 'w'), ('y', 'h'), ('z', 'd')]:
+                detectionStr += "\t\tvector $c{0}_n{1} = $c{0}_v{1} - ($c{0}_u * dot($c{0}_v{1}, $c{0}_u));\n".format(index, axis)
+                detectionStr += "\t\tif (mag($c{0}_n{1}) > 0.001)\n".format(index, axis)
+                detectionStr += "\t\t{\n"
+                detectionStr += "\t\t\tfloat $c{0}_t{1} = $c{0}_ts;\n".format(index, axis)
+                detectionStr += "\t\t\tfloat $c{0}_a{1} = ($c{0}_{2} + $p_radius - abs($c{0}_l{1} + ($c{0}_s{1} * $c{0}_ts))) / $c{0}_ts;\n".format(index, axis, half)
+                detectionStr += "\t\t\t$c{0}_e = ($c{0}_{2} + $p_radius - abs($c{0}_l{1} + ($c{0}_s{1} * $c{0}_t1))) / $c{0}_t1;\n".format(index, axis, half)
+                detectionStr += "\t\t\tif ($c{0}_e > $c{0}_a{1}) {{$c{0}_a{1} = $c{0}_e; $c{0}_t{1} = $c{0}_t1;}}\n".format(index, axis)
+                detectionStr += "\t\t\tif (abs($c{0}_s{1}) > 0.000001)\n".format(index, axis)
+                detectionStr += "\t\t\t{\n"
+                detectionStr += "\t\t\t\t$c{0}_e = -$c{0}_l{1} / $c{0}_s{1};\n".format(index, axis)
+                detectionStr += "\t\t\t\tif ($c{0}_e > $c{0}_ts && $c{0}_e < $c{0}_t1 && ($c{0}_{2} + $p_radius) / $c{0}_e > $c{0}_a{1}) {{$c{0}_a{1} = ($c{0}_{2} + $p_radius) / $c{0}_e; $c{0}_t{1} = $c{0}_e;}}\n".format(index, axis, half)
+                detectionStr += "\t\t\t}\n"
+                detectionStr += "\t\t\tif ($c{0}_a{1} / mag($c{0}_n{1}) < $c{0}_best)\n".format(index, axis)
+                detectionStr += "\t\t\t{\n"
+                detectionStr += "\t\t\t\t$c{0}_best = $c{0}_a{1} / mag($c{0}_n{1});\n".format(index, axis)
+                detectionStr += "\t\t\t\t$c{0}_e = $c{0}_l{1} + ($c{0}_s{1} * $c{0}_t{1});\n".format(index, axis)
+                detectionStr += "\t\t\t\t$c{0}_a{1} = $c{0}_a{1} * $c{0}_t{1} / mag($c{0}_n{1});\n".format(index, axis)
+                detectionStr += "\t\t\t\tif ($c{0}_e < -0.0001) $c{0}_a{1} = -$c{0}_a{1};\n".format(index, axis)
+                detectionStr += "\t\t\t\t$sq = $p0 + ($seg * $c{0}_t{1});\n".format(index, axis)
+                detectionStr += "\t\t\t\t$c{0}_push = unit($c{0}_n{1}) * $c{0}_a{1};\n".format(index, axis)
+                detectionStr += "\t\t\t}\n"
+                detectionStr += "\t\t}\n"
+            detectionStr += "\t\t$sq = $sq + $c{0}_push;\n".format(index)
+            detectionStr += "\t\t$p = $p0 + (unit($sq - $p0) * mag($seg));\n"
+            detectionStr += "\t}\n\n"
+        else:
+            detectionStr += "\t$c{0}_cp = $p - $c{0};\n".format(index)
+            detectionStr += "\t$c{0}_lx = dot($c{0}_vx, $c{0}_cp);\n".format(index)
+            detectionStr += "\t$c{0}_ly = dot($c{0}_vy, $c{0}_cp);\n".format(index)
+            detectionStr += "\t$c{0}_lz = dot($c{0}_vz, $c{0}_cp);\n".format(index)
+            detectionStr += "\tif ($c{0}_lx != 0){{if (abs(($c{0}_w + $p_radius) / $c{0}_lx) < 1.0) {{$c{0}_hit = 0;}}}}\n".format(index)
+            detectionStr += "\tif ($c{0}_ly != 0){{if (abs(($c{0}_h + $p_radius) / $c{0}_ly) < 1.0) {{$c{0}_hit = 0;}}}}\n".format(index)
+            detectionStr += "\tif ($c{0}_lz != 0){{if (abs(($c{0}_d + $p_radius) / $c{0}_lz) < 1.0) {{$c{0}_hit = 0;}}}}\n".format(index)
+            detectionStr += "\n"
+            detectionStr += "\tif ($c{0}_hit) {{\n".format(index)
+            detectionStr += "\t\tif ($c{0}_lx != 0){{$c{0}_min_l = abs(($c{0}_w + $p_radius) / $c{0}_lx);}}\n".format(index)
+            detectionStr += "\t\tif ($c{0}_ly != 0){{$c{0}_min_l = min($c{0}_min_l, abs(($c{0}_h + $p_radius) / $c{0}_ly));}}\n".format(index)
+            detectionStr += "\t\tif ($c{0}_lz != 0){{$c{0}_min_l = min($c{0}_min_l, abs(($c{0}_d + $p_radius) / $c{0}_lz));}}\n".format(index)
+            detectionStr += "\t\tif ($c{0}_min_l == 99999){{\n".format(index)
+            detectionStr += "\t\t\t$p = $c{0} + <<$c{0}_w + $p_radius, 0, 0>>;\n".format(index)
+            detectionStr += "\t\t} else {\n"
+            detectionStr += "\t\t\t$p = $c{0} + ($c{0}_cp * $c{0}_min_l);\n".format(index)
+            detectionStr += "\t\t}\n"
+            detectionStr += "\t}\n\n"
+
+    elif colliderType == 'heightfield':
+        dm = nodes.get('dm')
+
+        res_u = data['resolutionU']
+        res_v = data['resolutionV']
+        # all heights are read in define block, so inputs and define cost grow with resolution.
+        heights = ', '.join(['{}.heights[{}]'.format(col, i) for i in range(res_u * res_v)])
+
+        # define
+        defineStr += frame(index, nodes)
+        if hub:
+            if scalable:
+                defineStr += "float $c{0}_scaleFactor = {1}.scaleFactor;\n".format(index, hub)
+                defineStr += "float $c{0}_w = {1}.scaledHalfWidth;\n".format(index, hub)
+                defineStr += "float $c{0}_d = {1}.scaledHalfDepth;\n".format(index, hub)
+            else:
+                defineStr += "float $c{0}_w = {1}.halfWidth;\n".format(index, hub)
+                defineStr += "float $c{0}_d = {1}.halfDepth;\n".format(index, hub)
+        elif scalable:
+            defineStr += "float $c{0}_scaleFactor = {1}.outputScaleZ;\n".format(index, dm)
+            defineStr += "float $c{0}_w = {1}.width / 2.0 * $c{0}_scaleFactor;\n".format(index, col)
+            defineStr += "float $c{0}_d = {1}.depth / 2.0 * $c{0}_scaleFactor;\n".format(index, col)
+        else:
+            defineStr += "float $c{0}_w = {1}.width / 2.0;\n".format(index, col)
+            defineStr += "float $c{0}_d = {1}.depth / 2.0;\n".format(index, col)
+        defineStr += "float $c{0}_hf[] = {{{1}}};\n\n".format(index, heights)
+
+        defineStr += "vector $c{0}_cp = <<0,0,0>>;\n".format(index)
+        defineStr += "float $c{0}_u = 0;\n".format(index)
+        defineStr += "float $c{0}_v = 0;\n".format(index)
+        defineStr += "float $c{0}_h = 0;\n".format(index)
+        defineStr += "float $c{0}_ly = 0;\n".format(index)
+        defineStr += "int $c{0}_i = 0;\n".format(index)
+        defineStr += "int $c{0}_j = 0;\n\n".format(index)
+
+        # detection (bilinear lookup)
+        detectionStr += "\t$c{0}_cp = $p - $c{0};\n".format(index)
+        detectionStr += "\t$c{0}_u = (dot($c{0}_vx, $c{0}_cp) + $c{0}_w) / ($c{0}_w * 2.0) * {1};\n".format(index, res_u - 1)
+        detectionStr += "\t$c{0}_v = ($c{0}_d - dot($c{0}_vz, $c{0}_cp)) / ($c{0}_d * 2.0) * {1};\n".format(index, res_v - 1)
+        detectionStr += "\tif ($c{0}_u >= 0 && $c{0}_u <= {1} && $c{0}_v >= 0 && $c{0}_v <= {2})\n".format(index, res_u - 1, res_v - 1)
+        detectionStr += "\t{\n"
+        detectionStr += "\t\t$c{0}_i = min(floor($c{0}_u), {1});\n".format(index, res_u - 2)
+        detectionStr += "\t\t$c{0}_j = min(floor($c{0}_v), {1});\n".format(index, res_v - 2)
+        detectionStr += "\t\t$c{0}_u = $c{0}_u - $c{0}_i;\n".format(index)
+        detectionStr += "\t\t$c{0}_v = $c{0}_v - $c{0}_j;\n".format(index)
+        detectionStr += "\t\t$c{0}_h = ($c{0}_hf[$c{0}_j*{1}+$c{0}_i] * (1.0-$c{0}_u) + $c{0}_hf[$c{0}_j*{1}+$c{0}_i+1] * $c{0}_u) * (1.0-$c{0}_v)".format(index, res_u)
+        detectionStr += " + ($c{0}_hf[($c{0}_j+1)*{1}+$c{0}_i] * (1.0-$c{0}_u) + $c{0}_hf[($c{0}_j+1)*{1}+$c{0}_i+1] * $c{0}_u) * $c{0}_v;\n".format(index, res_u)
+        if scalable:
+            detectionStr += "\t\t$c{0}_h = $c{0}_h * $c{0}_scaleFactor;\n".format(index)
+        detectionStr += "\t\t$c{0}_ly = dot($c{0}_vy, $c{0}_cp);\n".format(index)
+        detectionStr += "\t\tif ($c{0}_ly < $c{0}_h + $p_radius)\n".format(index)
+        detectionStr += "\t\t\t$p = $p + ($c{0}_vy * ($c{0}_h + $p_radius - $c{0}_ly));\n".format(index)
+        detectionStr += "\t}\n\n"
+
+    elif colliderType == 'sdf':
+        dm = nodes.get('dm')
+
+        # baked grid is embedded in expression, so rebaking requires recreating the detection.
+        # the array literal is rebuilt on each evaluation, so define cost grows with the grid size.
+        rx, ry, rz = data['resolution']
+        cellSize = data['cellSize']
+        origin = sdf.origin([rx, ry, rz], cellSize)
+        distances = ', '.join([sdf.literal(d) for d in data['distances']])
+
+        # define
+        defineStr += frame(index, nodes)
+        if scalable and hub:
+            defineStr += "float $c{0}_scaleFactor = {1}.scaleFactor;\n".format(index, hub)
+        elif scalable:
+            defineStr += "float $c{0}_scaleFactor = {1}.outputScaleZ;\n".format(index, dm)
+        else:
+            defineStr += "float $c{0}_scaleFactor = 1.0;\n".format(index)
+        defineStr += "float $c{0}_sdf[] = {{{1}}};\n\n".format(index, distances)
+
+        defineStr += "vector $c{0}_cp = <<0,0,0>>;\n".format(index)
+        defineStr += "vector $c{0}_g = <<0,0,0>>;\n".format(index)
+        defineStr += "float $c{0}_x = 0;\n".format(index)
+        defineStr += "float $c{0}_y = 0;\n".format(index)
+        defineStr += "float $c{0}_z = 0;\n".format(index)
+        defineStr += "float $c{0}_dist = 0;\n".format(index)
+        defineStr += "int $c{0}_n = 0;\n\n".format(index)
+
+        # detection (trilinear sample and gradient)
+        detectionStr += "\t$c{0}_cp = ($p - $c{0}) / $c{0}_scaleFactor;\n".format(index)
+        detectionStr += "\t$c{0}_x = (dot($c{0}_vx, $c{0}_cp) - {1}) / {2};\n".format(index, origin[0], cellSize)
+        detectionStr += "\t$c{0}_y = (dot($c{0}_vy, $c{0}_cp) - {1}) / {2};\n".format(index, origin[1], cellSize)
+        detectionStr += "\t$c{0}_z = (dot($c{0}_vz, $c{0}_cp) - {1}) / {2};\n".format(index, origin[2], cellSize)
+        detectionStr += "\tif ($c{0}_x >= 0 && $c{0}_x <= {1} && $c{0}_y >= 0 && $c{0}_y <= {2} && $c{0}_z >= 0 && $c{0}_z <= {3})\n".format(index, rx - 1, ry - 1, rz - 1)
+        detectionStr += "\t{\n"
+        detectionStr += "\t\tint $c{0}_i = min(floor($c{0}_x), {1});\n".format(index, rx - 2)
+        detectionStr += "\t\tint $c{0}_j = min(floor($c{0}_y), {1});\n".format(index, ry - 2)
+        detectionStr += "\t\tint $c{0}_k = min(floor($c{0}_z), {1});\n".format(index, rz - 2)
+        detectionStr += "\t\tfloat $fx = $c{0}_x - $c{0}_i;\n".format(index)
+        detectionStr += "\t\tfloat $fy = $c{0}_y - $c{0}_j;\n".format(index)
+        detectionStr += "\t\tfloat $fz = $c{0}_z - $c{0}_k;\n".format(index)
+        detectionStr += "\t\t$c{0}_n = ($c{0}_k * {1} + $c{0}_j) * {2} + $c{0}_i;\n".format(index, ry, rx)
+        detectionStr += "\t\tfloat $d000 = $c{0}_sdf[$c{0}_n];\n".format(index)
+        detectionStr += "\t\tfloat $d100 = $c{0}_sdf[$c{0}_n + 1];\n".format(index)
+        detectionStr += "\t\tfloat $d010 = $c{0}_sdf[$c{0}_n + {1}];\n".format(index, rx)
+        detectionStr += "\t\tfloat $d110 = $c{0}_sdf[$c{0}_n + {1}];\n".format(index, rx + 1)
+        detectionStr += "\t\tfloat $d001 = $c{0}_sdf[$c{0}_n + {1}];\n".format(index, rx * ry)
+        detectionStr += "\t\tfloat $d101 = $c{0}_sdf[$c{0}_n + {1}];\n".format(index, rx * ry + 1)
+        detectionStr += "\t\tfloat $d011 = $c{0}_sdf[$c{0}_n + {1}];\n".format(index, rx * ry + rx)
+        detectionStr += "\t\tfloat $d111 = $c{0}_sdf[$c{0}_n + {1}];\n".format(index, rx * ry + rx + 1)
+        detectionStr += "\t\tfloat $d00 = $d000 + ($d100 - $d000) * $fx;\n"
+        detectionStr += "\t\tfloat $d10 = $d010 + ($d110 - $d010) * $fx;\n"
+        detectionStr += "\t\tfloat $d01 = $d001 + ($d101 - $d001) * $fx;\n"
+        detectionStr += "\t\tfloat $d11 = $d011 + ($d111 - $d011) * $fx;\n"
+        detectionStr += "\t\tfloat $d0 = $d00 + ($d10 - $d00) * $fy;\n"
+        detectionStr += "\t\tfloat $d1 = $d01 + ($d11 - $d01) * $fy;\n"
+        detectionStr += "\t\tfloat $gx0 = ($d100 - $d000) + (($d110 - $d010) - ($d100 - $d000)) * $fy;\n"
+        detectionStr += "\t\tfloat $gx1 = ($d101 - $d001) + (($d111 - $d011) - ($d101 - $d001)) * $fy;\n"
+        detectionStr += "\t\t$c{0}_g = ($c{0}_vx * ($gx0 + ($gx1 - $gx0) * $fz)) + ($c{0}_vy * (($d10 - $d00) + (($d11 - $d01) - ($d10 - $d00)) * $fz)) + ($c{0}_vz * ($d1 - $d0));\n".format(index)
+        detectionStr += "\t\t$c{0}_dist = ($d0 + ($d1 - $d0) * $fz) * $c{0}_scaleFactor;\n".format(index)
+        detectionStr += "\t\tif ($c{0}_dist < $p_radius && mag($c{0}_g) > 0)\n".format(index)
+        detectionStr += "\t\t\t$p = $p + (unit($c{0}_g) * ($p_radius - $c{0}_dist));\n".format(index)
+        detectionStr += "\t}\n\n"
+
+    return defineStr, detectionStr
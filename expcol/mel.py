@@ -0,0 +1,552 @@
+# -*- coding: utf-8 -*-
+"""
+    Evaluator for the MEL subset emitted by expcol.expstr.
+
+    This module does not depend on Maya. Attribute reads are bound to supplied values,
+    and attribute writes are collected, so generated expressions can be executed headlessly.
+
+    Supported:
+        int / float / vector variables and arrays, vector literal <<x, y, z>>, component access ($v.x),
+        arithmetic, comparison and logical operators, if / else, for, while, ++, --, +=, -=, *=, /=,
+        dot, unit, mag, abs, min, max, floor, ceil, sqrt, pow, clamp, cross.
+
+    Executed operations are counted for each section. A section starts at each comment line
+    (e.g. "//sphereCollider1"), so operations of each collider can be counted separately.
+    Operations inside loops (collision iteration) are also counted separately from the define block.
+"""
+import math
+import re
+
+class MelError(Exception):
+    pass
+
+_TOKEN = re.compile(r'''
+    (?P<comment>//[^\n]*)
+    |(?P<space>\s+)
+    |(?P<number>(\d+\.\d*|\.\d+|\d+)([eE][-+]?\d+)?)
+    |(?P<var>\$[A-Za-z_]\w*)
+    |(?P<name>[A-Za-z_][\w:]*(\|[A-Za-z_][\w:]*)*)
+    |(?P<op><<|>>|\+\+|--|\+=|-=|\*=|/=|==|!=|<=|>=|&&|\|\||[-+*/%<>=!(){}\[\];,.^])
+''', re.VERBOSE)
+
+_TYPES = ('int', 'float', 'vector')
+
+_FUNCTIONS = {
+    'dot': lambda a, b: sum(x * y for x, y in zip(a, b)),
+    'mag': lambda v: math.sqrt(sum(x * x for x in v)),
+    'abs': lambda x: tuple(abs(a) for a in x) if isinstance(x, tuple) else abs(x),
+    'min': min,
+    'max': max,
+    'floor': lambda x: float(math.floor(x)),
+    'ceil': lambda x: float(math.ceil(x)),
+    'sqrt': math.sqrt,
+    'pow': math.pow,
+    'clamp': lambda lo, hi, x: min(max(x, lo), hi),
+    'cross': lambda a, b: (a[1]*b[2] - a[2]*b[1], a[2]*b[0] - a[0]*b[2], a[0]*b[1] - a[1]*b[0]),
+}
+
+def _unit(v):
+    length = math.sqrt(sum(x * x for x in v))
+    if length == 0:
+        return (0.0, 0.0, 0.0)
+    return tuple(x / length for x in v)
+
+_FUNCTIONS['unit'] = _unit
+
+def tokenize(source):
+    tokens = []
+    pos = 0
+    while pos < len(source):
+        m = _TOKEN.match(source, pos)
+        if not m:
+            raise MelError('Unexpected character {!r} at {}.'.format(source[pos], pos))
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == 'space':
+            continue
+        if kind == 'comment':
+            tokens.append(('comment', m.group(kind)[2:].strip()))
+        elif kind == 'number':
+            text = m.group(kind)
+            if re.match(r'^\d+$', text):
+                tokens.append(('number', int(text)))
+            else:
+                tokens.append(('number', float(text)))
+        else:
+            tokens.append((kind, m.group(kind)))
+    tokens.append(('end', None))
+    return tokens
+
+
+class _Parser(object):
+
+    def __init__(self, source):
+        self.tokens = tokenize(source)
+        self.pos = 0
+
+    def peek(self, offset=0):
+        return self.tokens[self.pos + offset]
+
+    def next(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def accept(self, value):
+        if self.peek()[0] in ('op', 'name') and self.peek()[1] == value:
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, value):
+        if not self.accept(value):
+            raise MelError('Expected {!r} but found {!r}.'.format(value, self.peek()[1]))
+
+    def program(self):
+        statements = []
+        while self.peek()[0] != 'end':
+            statements.append(self.statement())
+        return ('block', statements)
+
+    def statement(self):
+        kind, value = self.peek()
+        if kind == 'comment':
+            self.next()
+            return ('section', value)
+        if self.accept(';'):
+            return ('block', [])
+        if self.accept('{'):
+            statements = []
+            while not self.accept('}'):
+                statements.append(self.statement())
+            return ('block', statements)
+        if self.accept('if'):
+            self.expect('(')
+            cond = self.expression()
+            self.expect(')')
+            then = self.statement()
+            other = None
+            while self.peek()[0] == 'comment' and self.peek(1) == ('name', 'else'):
+                self.next()
+            if self.accept('else'):
+                other = self.statement()
+            return ('if', cond, then, other)
+        if self.accept('for'):
+            self.expect('(')
+            init = None if self.peek() == ('op', ';') else self.simple()
+            self.expect(';')
+            cond = None if self.peek() == ('op', ';') else self.expression()
+            self.expect(';')
+            step = None if self.peek() == ('op', ')') else self.simple()
+            self.expect(')')
+            return ('for', init, cond, step, self.statement())
+        if self.accept('while'):
+            self.expect('(')
+            cond = self.expression()
+            self.expect(')')
+            return ('for', None, cond, None, self.statement())
+        if kind == 'name' and value in _TYPES:
+            self.next()
+            declarations = []
+            while True:
+                name = self.next()
+                if name[0] != 'var':
+                    raise MelError('Expected variable name but found {!r}.'.format(name[1]))
+                array = False
+                if self.accept('['):
+                    self.expect(']')
+                    array = True
+                init = self.expression() if self.accept('=') else None
+                declarations.append(('declare', value, name[1], array, init))
+                if not self.accept(','):
+                    break
+            self.expect(';')
+            return ('block', declarations) if len(declarations) > 1 else declarations[0]
+        stmt = self.simple()
+        self.expect(';')
+        return stmt
+
+    def simple(self):
+        target = self.expression()
+        for op in ('=', '+=', '-=', '*=', '/='):
+            if self.accept(op):
+                self.check_target(target)
+                return ('assign', op, target, self.expression())
+        for op in ('++', '--'):
+            if self.accept(op):
+                self.check_target(target)
+                return ('assign', op[0] + '=', target, ('number', 1))
+        return ('expr', target)
+
+    def check_target(self, target):
+        if target[0] not in ('var', 'index', 'attr'):
+            raise MelError('Cannot assign to {!r}.'.format(target[0]))
+
+    def expression(self):
+        return self.binary(0)
+
+    _LEVELS = [('||',), ('&&',), ('==', '!='), ('<', '<=', '>', '>='), ('+', '-'), ('*', '/', '%', '^')]
+
+    def binary(self, level):
+        if level == len(self._LEVELS):
+            return self.unary()
+        left = self.binary(level + 1)
+        while self.peek()[0] == 'op' and self.peek()[1] in self._LEVELS[level]:
+            op = self.next()[1]
+            left = ('binary', op, left, self.binary(level + 1))
+        return left
+
+    def unary(self):
+        if self.accept('-'):
+            return ('unary', '-', self.unary())
+        if self.accept('!'):
+            return ('unary', '!', self.unary())
+        if self.accept('+'):
+            return self.unary()
+        return self.postfix()
+
+    def postfix(self):
+        node = self.primary()
+        while True:
+            if self.peek() == ('op', '[') and node[0] == 'var':
+                self.next()
+                node = ('index', node, self.expression())
+                self.expect(']')
+            elif self.peek() == ('op', '.') and self.peek(1)[0] == 'name' and self.peek(1)[1] in ('x', 'y', 'z'):
+                self.next()
+                node = ('component', node, 'xyz'.index(self.next()[1]))
+            else:
+                return node
+
+    def primary(self):
+        kind, value = self.next()
+        if kind == 'number':
+            return ('number', value)
+        if kind == 'var':
+            return ('var', value)
+        if kind == 'op' and value == '(':
+            node = self.expression()
+            self.expect(')')
+            return node
+        if kind == 'op' and value == '<<':
+            items = [self.binary(2)]
+            while self.accept(','):
+                items.append(self.binary(2))
+            self.expect('>>')
+            if len(items) != 3:
+                raise MelError('Vector literal requires 3 components.')
+            return ('vector', items)
+        if kind == 'op' and value == '{':
+            items = []
+            if not self.accept('}'):
+                items.append(self.expression())
+                while self.accept(','):
+                    items.append(self.expression())
+                self.expect('}')
+            return ('array', items)
+        if kind == 'name':
+            if self.peek() == ('op', '('):
+                self.next()
+                args = []
+                if not self.accept(')'):
+                    args.append(self.expression())
+                    while self.accept(','):
+                        args.append(self.expression())
+                    self.expect(')')
+                return ('call', value, args)
+            # attribute reference (node.attr, node.attr[0], node.attr[0].child)
+            attr = value
+            while self.peek() == ('op', '.') or self.peek() == ('op', '['):
+                if self.accept('.'):
+                    name = self.next()
+                    if name[0] != 'name':
+                        raise MelError('Invalid attribute {!r}.'.format(attr))
+                    attr += '.' + name[1]
+                else:
+                    self.next()
+                    number = self.next()
+                    if number[0] != 'number':
+                        raise MelError('Invalid attribute index in {!r}.'.format(attr))
+                    self.expect(']')
+                    attr += '[{}]'.format(number[1])
+            if '.' not in attr:
+                raise MelError('Unknown name {!r}.'.format(attr))
+            return ('attr', attr)
+        raise MelError('Unexpected token {!r}.'.format(value))
+
+
+class Result(object):
+    """ result of evaluate()
+
+    Attributes:
+        variables (dict): variables at the end of the expression.
+        outputs (dict): values written to attributes.
+        ops (dict): executed operations for each section {section: {operation: count}}.
+        loop_ops (dict): same as ops, but only operations executed inside loops.
+        iterations (int): number of executed loop bodies.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.outputs = {}
+        self.ops = {}
+        self.loop_ops = {}
+        self.iterations = 0
+
+    def count(self, section=None, loop=False, define=False):
+        """ total number of executed operations
+
+        Args:
+            section (str, optional): section name. Defaults to all sections.
+            loop (bool, optional): count only operations inside loops. Defaults to False.
+            define (bool, optional): count only operations outside loops (define block and output). Defaults to False.
+
+        Returns:
+            int: number of operations.
+        """
+        if define:
+            return self.count(section) - self.count(section, loop=True)
+        ops = self.loop_ops if loop else self.ops
+        if section is None:
+            return sum(sum(c.values()) for c in ops.values())
+        return sum(ops.get(section, {}).values())
+
+
+class _Interpreter(object):
+
+    def __init__(self, attrs):
+        self.attrs = attrs
+        self.result = Result()
+        self.section = ''
+        self.loop_depth = 0
+        self.types = {}
+
+    def count(self, op):
+        ops = self.result.ops.setdefault(self.section, {})
+        ops[op] = ops.get(op, 0) + 1
+        if self.loop_depth:
+            ops = self.result.loop_ops.setdefault(self.section, {})
+            ops[op] = ops.get(op, 0) + 1
+
+    def convert(self, type, value):
+        if type == 'int':
+            return int(value)
+        if type == 'float':
+            if isinstance(value, tuple):
+                raise MelError('Cannot convert vector to float.')
+            return float(value)
+        if type == 'vector':
+            if not isinstance(value, tuple):
+                return (float(value),) * 3
+        return value
+
+    def typeof(self, value):
+        if isinstance(value, tuple):
+            return 'vector'
+        if isinstance(value, int):
+            return 'int'
+        return 'float'
+
+    def run(self, node):
+        kind = node[0]
+        if kind == 'block':
+            for stmt in node[1]:
+                self.run(stmt)
+        elif kind == 'section':
+            self.section = node[1]
+        elif kind == 'declare':
+            type, name, array, init = node[1:]
+            self.types[name] = type
+            if array:
+                value = self.eval(init) if init else []
+                self.result.variables[name] = [self.convert(type, v) for v in value]
+            else:
+                value = self.eval(init) if init else 0
+                self.result.variables[name] = self.convert(type, value)
+            if init:
+                self.count('=')
+        elif kind == 'assign':
+            self.assign(node[1], node[2], node[3])
+        elif kind == 'expr':
+            self.eval(node[1])
+        elif kind == 'if':
+            if self.truth(self.eval(node[1])):
+                self.run(node[2])
+            elif node[3]:
+                self.run(node[3])
+        elif kind == 'for':
+            init, cond, step, body = node[1:]
+            if init:
+                self.run(init)
+            section = self.section
+            while cond is None or self.truth(self.eval(cond)):
+                self.loop_depth += 1
+                self.result.iterations += 1
+                self.run(body)
+                self.loop_depth -= 1
+                self.section = section
+                if step:
+                    self.run(step)
+        else:
+            raise MelError('Unknown statement {!r}.'.format(kind))
+
+    def truth(self, value):
+        if isinstance(value, tuple):
+            return any(value)
+        return bool(value)
+
+    def assign(self, op, target, expr):
+        value = self.eval(expr)
+        if op != '=':
+            value = self.binary(op[0], self.eval(target), value)
+        self.count('=')
+
+        if target[0] == 'attr':
+            self.result.outputs[target[1]] = value
+        elif target[0] == 'var':
+            name = target[1]
+            if name not in self.types:
+                self.types[name] = self.typeof(value)
+            self.result.variables[name] = self.convert(self.types[name], value)
+        else:
+            name = target[1][1]
+            array = self.variable(name)
+            i = int(self.eval(target[2]))
+            while len(array) <= i:
+                array.append(0)
+            array[i] = self.convert(self.types[name], value)
+
+    def variable(self, name):
+        if name not in self.result.variables:
+            raise MelError('Undefined variable {}.'.format(name))
+        return self.result.variables[name]
+
+    def eval(self, node):
+        kind = node[0]
+        if kind == 'number':
+            return node[1]
+        if kind == 'var':
+            return self.variable(node[1])
+        if kind == 'attr':
+            if node[1] not in self.attrs:
+                raise MelError('No value supplied for attribute {}.'.format(node[1]))
+            self.count('attr')
+            return self.attrs[node[1]]
+        if kind == 'vector':
+            return tuple(float(self.eval(item)) for item in node[1])
+        if kind == 'array':
+            # each element is counted, so baked arrays show up in the cost.
+            values = []
+            for item in node[1]:
+                values.append(self.eval(item))
+                self.count('{}')
+            return values
+        if kind == 'component':
+            return self.eval(node[1])[node[2]]
+        if kind == 'index':
+            array = self.variable(node[1][1])
+            i = int(self.eval(node[2]))
+            self.count('[]')
+            if i < 0 or i >= len(array):
+                raise MelError('Index {} out of range of {}.'.format(i, node[1][1]))
+            return array[i]
+        if kind == 'call':
+            if node[1] not in _FUNCTIONS:
+                raise MelError('Unsupported function {}.'.format(node[1]))
+            args = [self.eval(arg) for arg in node[2]]
+            self.count(node[1])
+            return _FUNCTIONS[node[1]](*args)
+        if kind == 'unary':
+            value = self.eval(node[2])
+            self.count(node[1])
+            if node[1] == '!':
+                return int(not self.truth(value))
+            if isinstance(value, tuple):
+                return tuple(-v for v in value)
+            return -value
+        if kind == 'binary':
+            op = node[1]
+            if op == '&&':
+                self.count(op)
+                return int(self.truth(self.eval(node[2])) and self.truth(self.eval(node[3])))
+            if op == '||':
+                self.count(op)
+                return int(self.truth(self.eval(node[2])) or self.truth(self.eval(node[3])))
+            left = self.eval(node[2])
+            right = self.eval(node[3])
+            self.count(op)
+            return self.binary(op, left, right)
+        raise MelError('Unknown expression {!r}.'.format(kind))
+
+    def binary(self, op, a, b):
+        va = isinstance(a, tuple)
+        vb = isinstance(b, tuple)
+        if op in ('+', '-'):
+            if va or vb:
+                a = a if va else (a,) * 3
+                b = b if vb else (b,) * 3
+                if op == '+':
+                    return tuple(x + y for x, y in zip(a, b))
+                return tuple(x - y for x, y in zip(a, b))
+            return a + b if op == '+' else a - b
+        if op == '*':
+            if va and vb:
+                return sum(x * y for x, y in zip(a, b))
+            if va:
+                return tuple(x * b for x in a)
+            if vb:
+                return tuple(a * y for y in b)
+            return a * b
+        if op == '/':
+            if vb:
+                raise MelError('Cannot divide by vector.')
+            if va:
+                return tuple(x / float(b) for x in a)
+            if isinstance(a, int) and isinstance(b, int):
+                return int(float(a) / b)
+            return a / float(b)
+        if op == '%':
+            return math.fmod(a, b) if isinstance(a, float) or isinstance(b, float) else int(math.fmod(a, b))
+        if op == '^':
+            return _FUNCTIONS['cross'](a, b)
+        if va or vb:
+            if op == '==':
+                return int(a == b)
+            if op == '!=':
+                return int(a != b)
+            raise MelError('Cannot compare vectors with {}.'.format(op))
+        return int({
+            '==': a == b,
+            '!=': a != b,
+            '<': a < b,
+            '<=': a <= b,
+            '>': a > b,
+            '>=': a >= b,
+        }[op])
+
+
+def parse(source):
+    """ parse expression string
+
+    Args:
+        source (str): expression string.
+
+    Returns:
+        tuple: syntax tree.
+    """
+    return _Parser(source).program()
+
+def evaluate(source, attrs, *args):
+    """ execute expression string
+
+    Args:
+        source (str or tuple): expression string or syntax tree created by parse().
+        attrs (dict): values of attributes read by the expression {'node.attr': value}.
+
+    Returns:
+        Result: variables, written attributes and executed operations.
+    """
+    tree = source if isinstance(source, tuple) else parse(source)
+    interpreter = _Interpreter(attrs)
+    interpreter.run(tree)
+    return interpreter.result
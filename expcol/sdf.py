@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+    Signed distance grid used by the 'sdf' collider.
+
+    This module does not depend on Maya, so baked grids can be sampled and
+    resolved offline (e.g. for checking the generated expression).
+
+    The grid is stored as a flat list of distances in the collider's local space.
+    Samples are placed on a regular lattice centered on the collider origin,
+    X varies fastest : index = (k * resolutionY + j) * resolutionX + i
+"""
+import math
+
+def origin(resolution, cellSize, *args):
+    """ local position of the first sample
+
+    Args:
+        resolution (list): number of samples along X, Y, Z.
+        cellSize (float): distance between neighbouring samples.
+
+    Returns:
+        list: local position of sample (0, 0, 0).
+    """
+    return [-(r - 1) * cellSize / 2.0 for r in resolution]
+
+def literal(distance, *args):
+    """ text of distance embedded in the expression, rounded to 5 significant digits
+
+    Args:
+        distance (float): signed distance.
+
+    Returns:
+        str: text of distance.
+    """
+    return '%.5g' % distance
+
+def sample(distances, resolution, cellSize, point, *args):
+    """ trilinear sample of the distance and its gradient
+
+    Args:
+        distances (list): flat list of signed distances.
+        resolution (list): number of samples along X, Y, Z.
+        cellSize (float): distance between neighbouring samples.
+        point (list): local position.
+
+    Returns:
+        tuple: signed distance (float) and gradient (list), or None if point is outside of the grid.
+    """
+    rx, ry, rz = resolution
+    o = origin(resolution, cellSize)
+    x = (point[0] - o[0]) / cellSize
+    y = (point[1] - o[1]) / cellSize
+    z = (point[2] - o[2]) / cellSize
+
+    if x < 0 or x > rx - 1 or y < 0 or y > ry - 1 or z < 0 or z > rz - 1:
+        return None
+
+    i = min(int(math.floor(x)), rx - 2)
+    j = min(int(math.floor(y)), ry - 2)
+    k = min(int(math.floor(z)), rz - 2)
+    fx = x - i
+    fy = y - j
+    fz = z - k
+
+    n = (k * ry + j) * rx + i
+    d000 = distances[n]
+    d100 = distances[n + 1]
+    d010 = distances[n + rx]
+    d110 = distances[n + rx + 1]
+    d001 = distances[n + rx * ry]
+    d101 = distances[n + rx * ry + 1]
+    d011 = distances[n + rx * ry + rx]
+    d111 = distances[n + rx * ry + rx + 1]
+
+    d00 = d000 + (d100 - d000) * fx
+    d10 = d010 + (d110 - d010) * fx
+    d01 = d001 + (d101 - d001) * fx
+    d11 = d011 + (d111 - d011) * fx
+    d0 = d00 + (d10 - d00) * fy
+    d1 = d01 + (d11 - d01) * fy
+
+    gx0 = (d100 - d000) + ((d110 - d010) - (d100 - d000)) * fy
+    gx1 = (d101 - d001) + ((d111 - d011) - (d101 - d001)) * fy
+    gradient = [
+        gx0 + (gx1 - gx0) * fz,
+        (d10 - d00) + ((d11 - d01) - (d10 - d00)) * fz,
+        d1 - d0
+    ]
+
+    return d0 + (d1 - d0) * fz, gradient
+
+def resolve(distances, resolution, cellSize, point, radius, *args):
+    """ push a sphere out of the surface along the gradient
+
+    Args:
+        distances (list): flat list of signed distances.
+        resolution (list): number of samples along X, Y, Z.
+        cellSize (float): distance between neighbouring samples.
+        point (list): local position of the sphere center.
+        radius (float): sphere radius.
+
+    Returns:
+        list: corrected local position.
+    """
+    result = sample(distances, resolution, cellSize, point)
+    if result is None:
+        return list(point)
+
+    distance, gradient = result
+    length = math.sqrt(gradient[0]**2 + gradient[1]**2 + gradient[2]**2)
+    if distance >= radius or length == 0:
+        return list(point)
+
+    return [point[a] + gradient[a] / length * (radius - distance) for a in range(3)]
@@ -0,0 +1,490 @@
+# -*- coding: utf-8 -*-
+"""
+    Reference solver of detections.
+
+    This module does not depend on Maya. It resolves a point against colliders described in world space,
+    following the same steps as the generated expression. verify() generates the expression with expcol.expstr,
+    executes it with expcol.mel and compares the result with the reference solver.
+
+    Colliders are described as dict (world space) :
+        sphere        : center, radius
+        infinitePlane : center, normal
+        capsule       : a, b, radius
+        capsule2      : a, b, radiusA, radiusB
+        cuboid        : center, axes, width, height, depth
+        heightfield   : center, axes, width, depth, resolution [u, v], heights
+        sdf           : center, axes, resolution [x, y, z], cellSize, distances
+    with 'type', optional 'name' and optional 'scale' (Defaults to 1.0).
+    'axes' are the unit vectors of local X, Y, Z.
+"""
+import math
+
+from . import expstr
+from . import mel
+from . import sdf
+
+def _add(a, b):
+    return [a[0] + b[0], a[1] + b[1], a[2] + b[2]]
+
+def _sub(a, b):
+    return [a[0] - b[0], a[1] - b[1], a[2] - b[2]]
+
+def _mul(a, s):
+    return [a[0] * s, a[1] * s, a[2] * s]
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+def _mag(a):
+    return math.sqrt(_dot(a, a))
+
+def _unit(a):
+    length = _mag(a)
+    if length == 0:
+        return [0.0, 0.0, 0.0]
+    return _mul(a, 1.0 / length)
+
+def name(col, index, *args):
+    return col.get('name', '{}{}'.format(col['type'], index))
+
+def _scale(col, scalable):
+    return col.get('scale', 1.0) if scalable else 1.0
+
+def _closest(p0, seg, c):
+    """ parameter of the point on segment closest to c
+    """
+    return min(max(_dot(_sub(c, p0), seg) / _dot(seg, seg), 0), 1)
+
+def collide(p, p_radius, col, state, scalable=False, segment=None, *args):
+    """ resolve point against one collider (one iteration)
+
+    Args:
+        p (list): world position.
+        p_radius (float): radius of point.
+        col (dict): collider.
+        state (dict): values kept between iterations. Pass the same dict for each iteration.
+        scalable (bool, optional): use 'scale' of collider. Defaults to False.
+        segment (list, optional): world position of parent. Detect the link from parent to p and rotate it about parent
+            (sphere, capsule, capsule2 and cuboid). Defaults to None.
+
+    Returns:
+        list: corrected world position.
+    """
+    colliderType = col['type']
+    s = _scale(col, scalable)
+
+    if segment is not None:
+        p0 = segment
+        seg = _sub(p, p0)
+
+    if colliderType == 'sphere' and segment is not None:
+        c = col['center']
+        r = col['radius'] * s
+        st = _closest(p0, seg, c)
+        sq = _add(p0, _mul(seg, st))
+        if st > 0 and (r + p_radius) * (r + p_radius) > _dot(_sub(sq, c), _sub(sq, c)):
+            sq = _add(c, _mul(_unit(_sub(sq, c)), r + p_radius))
+            p = _add(p0, _mul(_unit(_sub(sq, p0)), _mag(seg)))
+
+    elif colliderType == 'sphere':
+        c = col['center']
+        r = col['radius'] * s
+        if (r + p_radius) * (r + p_radius) > _dot(_sub(p, c), _sub(p, c)):
+            p = _add(c, _mul(_unit(_sub(p, c)), r + p_radius))
+
+    elif colliderType == 'infinitePlane':
+        d = _dot(col['normal'], _sub(p, col['center']))
+        if d - p_radius < 0:
+            p = _sub(p, _mul(col['normal'], d - p_radius))
+
+    elif colliderType in ['capsule', 'capsule2'] and segment is not None:
+        a = col['a']
+        ba = _sub(col['b'], a)
+        if colliderType == 'capsule':
+            ra = rb = col['radius'] * s
+        else:
+            ra = col['radiusA'] * s
+            rb = col['radiusB'] * s
+        # closest points of two segments
+        ss = _dot(seg, seg)
+        sb = _dot(seg, ba)
+        sr = _dot(seg, _sub(p0, a))
+        bb = _dot(ba, ba)
+        br = _dot(ba, _sub(p0, a))
+        denom = ss * bb - sb * sb
+        st = 1
+        if denom > 0:
+            st = min(max((sb * br - sr * bb) / denom, 0), 1)
+        t = (sb * st + br) / bb
+        if t < 0:
+            t = 0
+            st = min(max(-sr / ss, 0), 1)
+        elif t > 1:
+            t = 1
+            st = min(max((sb - sr) / ss, 0), 1)
+        sq = _add(p0, _mul(seg, st))
+        q = _add(a, _mul(ba, t))
+        r = ra * (1.0 - t) + rb * t
+        if st > 0 and _dot(_sub(sq, q), _sub(sq, q)) < (r + p_radius) * (r + p_radius):
+            sq = _add(q, _mul(_unit(_sub(sq, q)), r + p_radius))
+            p = _add(p0, _mul(_unit(_sub(sq, p0)), _mag(seg)))
+
+    elif colliderType in ['capsule', 'capsule2']:
+        a = col['a']
+        b = col['b']
+        if colliderType == 'capsule':
+            ra = rb = col['radius'] * s
+        else:
+            ra = col['radiusA'] * s
+            rb = col['radiusB'] * s
+        height = _mag(_sub(b, a))
+        ab = _unit(_sub(b, a))
+        t = _dot(ab, _sub(p, a))
+        ratio = t / height
+        if ratio <= 0:
+            if _dot(_sub(p, a), _sub(p, a)) < (ra + p_radius) * (ra + p_radius):
+                p = _add(a, _mul(_unit(_sub(p, a)), ra + p_radius))
+        elif ratio >= 1:
+            if _dot(_sub(p, b), _sub(p, b)) < (rb + p_radius) * (rb + p_radius):
+                p = _add(b, _mul(_unit(_sub(p, b)), rb + p_radius))
+        else:
+            q = _add(a, _mul(ab, t))
+            r = ra * (1.0 - ratio) + rb * ratio
+            if _dot(_sub(p, q), _sub(p, q)) < (r + p_radius) * (r + p_radius):
+                p = _add(q, _mul(_unit(_sub(p, q)), r + p_radius))
+
+    elif colliderType == 'cuboid' and segment is not None:
+        # clip the link by slabs of the box expanded by radius, and rotate the link about p0 out of the box
+        c = col['center']
+        axes = col['axes']
+        half = [col['width'] / 2.0 * s, col['height'] / 2.0 * s, col['depth'] / 2.0 * s]
+        cp = _sub(p0, c)
+        t0 = 0
+        t1 = 1
+        l = [_dot(v, cp) for v in axes]
+        d = [_dot(v, seg) for v in axes]
+        for a in range(3):
+            if abs(d[a]) > 0.000001:
+                ta = (-(half[a] + p_radius) - l[a]) / d[a]
+                tb = ((half[a] + p_radius) - l[a]) / d[a]
+                t0 = max(t0, min(ta, tb))
+                t1 = min(t1, max(ta, tb))
+            elif abs(l[a]) >= half[a] + p_radius:
+                t1 = -1
+        st = (t0 + t1) * 0.5
+        if t0 <= t1 and st > 0:
+            # angle to clear each slab is depth / distance from p0 at the ends of the clipped range
+            # and at the center plane, divided by the length of the axis perpendicular to the link
+            u = _unit(seg)
+            ts = max(t0, st * 0.5)
+            best = 99999
+            push = [0, 0, 0]
+            for a in range(3):
+                n = _sub(axes[a], _mul(u, _dot(axes[a], u)))
+                if _mag(n) > 0.001:
+                    t = ts
+                    angle = (half[a] + p_radius - abs(l[a] + d[a] * ts)) / ts
+                    e = (half[a] + p_radius - abs(l[a] + d[a] * t1)) / t1
+                    if e > angle:
+                        angle = e
+                        t = t1
+                    if abs(d[a]) > 0.000001:
+                        e = -l[a] / d[a]
+                        if e > ts and e < t1 and (half[a] + p_radius) / e > angle:
+                            angle = (half[a] + p_radius) / e
+                            t = e
+                    if angle / _mag(n) < best:
+                        best = angle / _mag(n)
+                        depth = angle * t / _mag(n)
+                        sq = _add(p0, _mul(seg, t))
+                        push = _mul(_unit(n), -depth if l[a] + d[a] * t < -0.0001 else depth)
+            sq = _add(sq, push)
+            p = _add(p0, _mul(_unit(_sub(sq, p0)), _mag(seg)))
+
+    elif colliderType == 'cuboid':
+        # hit flag and min_l are kept between iterations, same as the expression.
+        state.setdefault('hit', 1)
+        state.setdefault('min_l', 99999)
+        c = col['center']
+        vx, vy, vz = col['axes']
+        half = [col['width'] / 2.0 * s, col['height'] / 2.0 * s, col['depth'] / 2.0 * s]
+        cp = _sub(p, c)
+        l = [_dot(vx, cp), _dot(vy, cp), _dot(vz, cp)]
+        for a in range(3):
+            if l[a] != 0 and abs((half[a] + p_radius) / l[a]) < 1.0:
+                state['hit'] = 0
+        if state['hit']:
+            if l[0] != 0:
+                state['min_l'] = abs((half[0] + p_radius) / l[0])
+            for a in [1, 2]:
+                if l[a] != 0:
+                    state['min_l'] = min(state['min_l'], abs((half[a] + p_radius) / l[a]))
+            if state['min_l'] == 99999:
+                p = _add(c, [half[0] + p_radius, 0, 0])
+            else:
+                p = _add(c, _mul(cp, state['min_l']))
+
+    elif colliderType == 'heightfield':
+        res_u, res_v = col['resolution']
+        vx, vy, vz = col['axes']
+        w = col['width'] / 2.0 * s
+        d = col['depth'] / 2.0 * s
+        heights = col['heights']
+        cp = _sub(p, col['center'])
+        u = (_dot(vx, cp) + w) / (w * 2.0) * (res_u - 1)
+        v = (d - _dot(vz, cp)) / (d * 2.0) * (res_v - 1)
+        if u >= 0 and u <= res_u - 1 and v >= 0 and v <= res_v - 1:
+            i = int(min(math.floor(u), res_u - 2))
+            j = int(min(math.floor(v), res_v - 2))
+            u = u - i
+            v = v - j
+            h = (heights[j*res_u+i] * (1.0-u) + heights[j*res_u+i+1] * u) * (1.0-v) \
+                + (heights[(j+1)*res_u+i] * (1.0-u) + heights[(j+1)*res_u+i+1] * u) * v
+            h = h * s
+            ly = _dot(vy, cp)
+            if ly < h + p_radius:
+                p = _add(p, _mul(vy, h + p_radius - ly))
+
+    elif colliderType == 'sdf':
+        vx, vy, vz = col['axes']
+        cp = _mul(_sub(p, col['center']), 1.0 / s)
+        distances = [float(sdf.literal(d)) for d in col['distances']] # same precision as the expression
+        # resolved in local space with sdf.resolve, radius is also converted to local space.
+        local = [_dot(vx, cp), _dot(vy, cp), _dot(vz, cp)]
+        delta = _sub(sdf.resolve(distances, col['resolution'], col['cellSize'], local, p_radius / s), local)
+        p = _add(p, _mul(_add(_add(_mul(vx, delta[0]), _mul(vy, delta[1])), _mul(vz, delta[2])), s))
+
+    return p
+
+def solve(p, p_radius, colliders, iterations=3, parent=None, distance=None, groundHeight=None, scalable=False, segment=False, neighbors=None, separation=0.0, *args):
+    """ resolve point against colliders
+
+    Args:
+        p (list): world position of input.
+        p_radius (float): radius of point.
+        colliders (list): list of colliders.
+        iterations (int, optional): collision iteration. Defaults to 3.
+        parent (list, optional): world position of parent. Defaults to None.
+        distance (float, optional): length between parent and input. Defaults to the current length.
+        groundHeight (float, optional): height of ground collision. Defaults to None.
+        scalable (bool, optional): use 'scale' of colliders. Defaults to False.
+        segment (bool, optional): detect the link from parent to p. Ignored if parent is None. Defaults to False.
+        neighbors (list, optional): world positions of corresponding links of neighbouring chains. Defaults to None.
+        separation (float, optional): minimum distance from neighbors. p is kept at half of it from the midpoint of p and each neighbor. Defaults to 0.0.
+
+    Returns:
+        list: world position of output.
+    """
+    p = list(p)
+    if parent is not None and distance is None:
+        distance = _mag(_sub(p, parent))
+
+    states = [{} for col in colliders]
+    midpoints = [_mul(_add(p, n), 0.5) for n in neighbors or []]
+    for i in range(iterations):
+        for col, state in zip(colliders, states):
+            p = collide(p, p_radius, col, state, scalable=scalable, segment=parent if segment else None)
+
+        for m in midpoints:
+            nv = _sub(p, m)
+            if _mag(nv) < separation * 0.5 and _mag(nv) > 0:
+                p = _add(m, _mul(_unit(nv), separation * 0.5))
+
+        if groundHeight is not None:
+            if p[1] < groundHeight + p_radius:
+                p = [p[0], groundHeight + p_radius, p[2]]
+
+        if parent is not None:
+            p = _add(parent, _mul(_unit(_sub(p, parent)), distance))
+
+    return p
+
+def bind(col, index, *args):
+    """ helper node names and attribute values used by the expression of collider
+
+    Args:
+        col (dict): collider.
+        index (int): collider index in expression.
+
+    Returns:
+        tuple: nodes (dict), data (dict) and attribute values (dict) for expstr.collision() and mel.evaluate().
+    """
+    colliderType = col['type']
+    n = name(col, index)
+    nodes = {}
+    data = {}
+    attrs = {}
+
+    def decompose(node, position, scale):
+        attrs[node + '.outputTranslateX'] = position[0]
+        attrs[node + '.outputTranslateY'] = position[1]
+        attrs[node + '.outputTranslateZ'] = position[2]
+        attrs[node + '.outputScaleZ'] = scale
+
+    def vector(node, v):
+        attrs[node + '.outputX'] = v[0]
+        attrs[node + '.outputY'] = v[1]
+        attrs[node + '.outputZ'] = v[2]
+
+    scale = col.get('scale', 1.0)
+    if colliderType in ['capsule', 'capsule2']:
+        nodes['dmA'] = '{}_dmA'.format(n)
+        nodes['dmB'] = '{}_dmB'.format(n)
+        decompose(nodes['dmA'], col['a'], scale)
+        decompose(nodes['dmB'], col['b'], scale)
+    else:
+        nodes['dm'] = '{}_dm'.format(n)
+        decompose(nodes['dm'], col['center'], scale)
+
+    if colliderType == 'infinitePlane':
+        nodes['vp_y'] = '{}_vp_y'.format(n)
+        vector(nodes['vp_y'], col['normal'])
+    elif colliderType in ['cuboid', 'heightfield', 'sdf']:
+        for axis, v in zip('xyz', col['axes']):
+            nodes['vp_' + axis] = '{}_vp_{}'.format(n, axis)
+            vector(nodes['vp_' + axis], v)
+
+    for at in ['radius', 'radiusA', 'radiusB', 'width', 'height', 'depth']:
+        if at in col:
+            attrs['{}.{}'.format(n, at)] = col[at]
+
+    if colliderType == 'heightfield':
+        data['resolutionU'], data['resolutionV'] = col['resolution']
+        for i, h in enumerate(col['heights']):
+            attrs['{}.heights[{}]'.format(n, i)] = h
+    elif colliderType == 'sdf':
+        data['resolution'] = col['resolution']
+        data['cellSize'] = col['cellSize']
+        data['distances'] = col['distances']
+
+    return nodes, data, attrs
+
+def verify(
+        colliders,
+        p,
+        radius=1.0,
+        parent=None,
+        iterations=3,
+        groundHeight=None,
+        scalable=False,
+        radius_rate=None,
+        tipRadius=1.0,
+        parent_scale=1.0,
+        hub=False,
+        segment=False,
+        neighbors=None,
+        separation=0.0,
+        tolerance=1e-6,
+        *args
+    ):
+    """ generate expression, execute it and compare with reference solver
+
+    Args:
+        colliders (list): list of colliders.
+        p (list): world position of input.
+        radius (float, optional): radius attribute of controller. Defaults to 1.0.
+        parent (list, optional): world position of parent. Defaults to None.
+        iterations (int, optional): collision iteration. Defaults to 3.
+        groundHeight (float, optional): height of ground collision. Defaults to None.
+        scalable (bool, optional): allow for parent scale of joint-chain and colliders. Defaults to False.
+        radius_rate (float, optional): rate at which radius and tip radius are interpolated. Defaults to None.
+        tipRadius (float, optional): tipRadius attribute of controller. Defaults to 1.0.
+        parent_scale (float, optional): scale of parent, used if scalable. Defaults to 1.0.
+        hub (bool, optional): read derived values of colliders from data hubs. Defaults to False.
+        segment (bool, optional): detect the link from parent to p. Ignored if parent is None. Defaults to False.
+        neighbors (list, optional): world positions of corresponding links of neighbouring chains. Defaults to None.
+        separation (float, optional): chainSeparation attribute of controller. Defaults to 0.0.
+        tolerance (float, optional): allowed difference. Defaults to 1e-6.
+
+    Returns:
+        dict: expression, output of expression, output of reference solver, error, match (bool),
+            executed operations per iteration for each collider type (ops), executed operations of define block
+            for each collider type (define_ops) and mel.Result (result).
+    """
+    controller = 'controller'
+    attrs = {
+        controller + '.radius': radius,
+        controller + '.tipRadius': tipRadius,
+        controller + '.colIteration': iterations,
+        controller + '.groundHeight': groundHeight if groundHeight is not None else 0.0,
+        controller + '.chainSeparation': separation,
+        'input_dm.outputTranslateX': p[0],
+        'input_dm.outputTranslateY': p[1],
+        'input_dm.outputTranslateZ': p[2],
+        'parent_dm.outputScaleZ': parent_scale,
+    }
+    if parent is not None:
+        attrs['parent_dm.outputTranslateX'] = parent[0]
+        attrs['parent_dm.outputTranslateY'] = parent[1]
+        attrs['parent_dm.outputTranslateZ'] = parent[2]
+
+    segment = segment and parent is not None
+
+    neighbor_dm = []
+    for n, pos in enumerate(neighbors or []):
+        neighbor_dm.append('neighbor{}_dm'.format(n))
+        attrs[neighbor_dm[-1] + '.outputTranslateX'] = pos[0]
+        attrs[neighbor_dm[-1] + '.outputTranslateY'] = pos[1]
+        attrs[neighbor_dm[-1] + '.outputTranslateZ'] = pos[2]
+
+    colliderExpStr = []
+    for j, col in enumerate(colliders):
+        nodes, data, col_attrs = bind(col, j)
+        attrs.update(col_attrs)
+        if hub:
+            hub_node = '{}_hub'.format(name(col, j))
+            attrs.update(mel.evaluate(expstr.hub(name(col, j), col['type'], nodes, hub_node), col_attrs).outputs)
+            nodes = {'hub': hub_node}
+        colliderExpStr.append(expstr.collision(name(col, j), j, col['type'], nodes, scalable=scalable, data=data, segment=segment))
+
+    distance = None
+    if parent is not None:
+        distance = _mag(_sub(p, parent))
+
+    expStr = expstr.detection(
+        controller,
+        'input_dm',
+        'output_vp',
+        colliderExpStr,
+        parent_dm='parent_dm' if parent is not None else None,
+        scale_dm='parent_dm',
+        groundCol=groundHeight is not None,
+        scalable=scalable,
+        radius_rate=radius_rate,
+        distance=distance,
+        segment=segment,
+        neighbors=neighbor_dm
+    )
+    result = mel.evaluate(expStr, attrs)
+    output = [result.outputs['output_vp.input1X'], result.outputs['output_vp.input1Y'], result.outputs['output_vp.input1Z']]
+
+    p_radius = radius
+    if radius_rate is not None:
+        p_radius = radius * (1.0 - radius_rate) + tipRadius * radius_rate
+    if scalable:
+        p_radius *= abs(parent_scale)
+        separation *= abs(parent_scale)
+    reference = solve(
+        p, p_radius, colliders, iterations, parent=parent, distance=distance, groundHeight=groundHeight, 
+        scalable=scalable, segment=segment, neighbors=neighbors, separation=separation
+    )
+
+    ops = {}
+    define_ops = {}
+    for j, col in enumerate(colliders):
+        count = result.count(name(col, j), loop=True)
+        ops[col['type']] = ops.get(col['type'], 0) + (float(count) / iterations if iterations else 0.0)
+        define_ops[col['type']] = define_ops.get(col['type'], 0) + result.count(name(col, j), define=True)
+
+    error = max(abs(a - b) for a, b in zip(output, reference))
+
+    return {
+        'expression': expStr,
+        'output': output,
+        'reference': reference,
+        'error': error,
+        'match': error <= tolerance,
+        'ops': ops,
+        'define_ops': define_ops,
+        'result': result,
+    }
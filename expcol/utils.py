@@ -80,3 +80,70 @@ def createUnitVector(node, vec=[1,0,0], *args):
     cmds.setAttr(vp + '.normalizeOutput', 1)
     cmds.connectAttr(node + ".worldMatrix[0]", vp + ".matrix", f=True)
     return vp
+
+def getColliderNodes(col, colliderType, *args):
+    """
+        get or create helper nodes (decomposeMatrix, vectorProduct) of collider.
+    """
+    nodes = {}
+
+    if colliderType == 'capsule' or colliderType == 'capsule2':
+        a = cmds.listConnections(col + '.sphereA', d=0)[0]
+        b = cmds.listConnections(col + '.sphereB', d=0)[0]
+        nodes['dmA'] = createDecomposeMatrix(a)
+        nodes['dmB'] = createDecomposeMatrix(b)
+    elif colliderType in ['sphere', 'infinitePlane', 'cuboid', 'heightfield', 'sdf']:
+        nodes['dm'] = createDecomposeMatrix(col)
+
+    if colliderType == 'infinitePlane':
+        nodes['vp_y'] = createUnitVector(col, vec=[0,1,0])
+    elif colliderType in ['cuboid', 'heightfield', 'sdf']:
+        nodes['vp_x'] = createUnitVector(col, vec=[1,0,0])
+        nodes['vp_y'] = createUnitVector(col, vec=[0,1,0])
+        nodes['vp_z'] = createUnitVector(col, vec=[0,0,1])
+
+    return nodes
+
+def mergeDuplicateNodes(nodeType, nodes=None, *args):
+    """
+        merge decomposeMatrix / vectorProduct nodes driven by the same matrix with the same settings.
+        if nodes is given, only these nodes are merged, otherwise all nodes in scene.
+        returns number of deleted nodes.
+    """
+    groups = {}
+    if nodes is None:
+        targets = cmds.ls(type=nodeType) or []
+    else:
+        targets = cmds.ls(nodes, type=nodeType) or []
+    for node in targets:
+        if nodeType == 'decomposeMatrix':
+            src = cmds.listConnections(node + '.inputMatrix', s=True, d=False, p=True)
+            if not src or cmds.listConnections(node + '.inputRotateOrder', s=True, d=False):
+                continue
+            key = (src[0], cmds.getAttr(node + '.inputRotateOrder'))
+        else:
+            src = cmds.listConnections(node + '.matrix', s=True, d=False, p=True)
+            if not src or cmds.listConnections(node + '.input1', s=True, d=False) or cmds.listConnections(node + '.input2', s=True, d=False):
+                continue
+            key = (
+                src[0],
+                cmds.getAttr(node + '.operation'),
+                cmds.getAttr(node + '.normalizeOutput'),
+                tuple(round(v, 6) for v in cmds.getAttr(node + '.input1')[0]),
+                tuple(round(v, 6) for v in cmds.getAttr(node + '.input2')[0])
+            )
+        groups.setdefault(key, []).append(node)
+
+    count = 0
+    for nodes in groups.values():
+        keep = nodes[0]
+        for node in nodes[1:]:
+            conns = cmds.listConnections(node, s=False, d=True, c=True, p=True) or []
+            for src, dst in zip(conns[::2], conns[1::2]):
+                if src.split('.', 1)[1] == 'message':
+                    continue
+                cmds.connectAttr(keep + '.' + src.split('.', 1)[1], dst, f=True)
+            cmds.delete(node)
+            count += 1
+
+    return count
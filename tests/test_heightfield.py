@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from expcol import solver
+
+AXES = [[1, 0, 0], [0, 1, 0], [0, 0, 1]]
+
+def heightfield(f, resolution=[3, 4], width=4.0, depth=6.0, center=[0, 0, 0]):
+    """ heightfield sampling f(x, z) in local space, U along +X and V along -Z """
+    res_u, res_v = resolution
+    heights = []
+    for j in range(res_v):
+        z = depth / 2.0 - j * depth / (res_v - 1)
+        for i in range(res_u):
+            x = -width / 2.0 + i * width / (res_u - 1)
+            heights.append(f(x, z))
+    return {
+        'type': 'heightfield', 'center': center, 'axes': AXES, 'width': width, 'depth': depth,
+        'resolution': resolution, 'heights': heights
+    }
+
+
+class TestHeightfield(unittest.TestCase):
+
+    def check(self, col, p, expected, **kwargs):
+        r = solver.verify([col], p, **kwargs)
+        for x, y in zip(r['output'], expected):
+            self.assertAlmostEqual(x, y)
+        for x, y in zip(r['reference'], expected):
+            self.assertAlmostEqual(x, y)
+
+    def test_flat(self):
+        col = heightfield(lambda x, z: 0.5, center=[1, -1, 0])
+        self.check(col, [1.5, -1.2, 0.7], [1.5, -0.3, 0.7], radius=0.2, iterations=1)
+        # above the surface
+        self.check(col, [1.5, 0.0, 0.7], [1.5, 0.0, 0.7], radius=0.2, iterations=1)
+        # outside of the grid
+        self.check(col, [3.5, -1.2, 0.7], [3.5, -1.2, 0.7], radius=0.2, iterations=1)
+
+    def test_slope_u(self):
+        """ heights increase along +X """
+        col = heightfield(lambda x, z: 0.25 * x)
+        self.check(col, [1.2, -1, 0.4], [1.2, 0.3 + 0.1, 0.4], radius=0.1, iterations=1)
+        self.check(col, [-1.2, -1, 0.4], [-1.2, -0.3 + 0.1, 0.4], radius=0.1, iterations=1)
+
+    def test_slope_v(self):
+        """ heights increase along -Z (V) """
+        col = heightfield(lambda x, z: 1.0 - 0.5 * z)
+        self.check(col, [0.3, -1, -2.0], [0.3, 2.0 + 0.1, -2.0], radius=0.1, iterations=1)
+        self.check(col, [0.3, -1, 1.0], [0.3, 0.5 + 0.1, 1.0], radius=0.1, iterations=1)
+
+    def test_scale(self):
+        col = heightfield(lambda x, z: 0.5)
+        col['scale'] = 2.0
+        self.check(col, [0.5, -1, 0.5], [0.5, 1.0 + 0.1, 0.5], radius=0.1, iterations=1, scalable=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
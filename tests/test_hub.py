@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from expcol import expstr, mel, solver
+
+
+def evaluate_hub(col):
+    nodes, data, attrs = solver.bind(col, 0)
+    return mel.evaluate(expstr.hub(solver.name(col, 0), col['type'], nodes, 'hub'), attrs).outputs
+
+
+class TestHub(unittest.TestCase):
+
+    def test_sphere(self):
+        outputs = evaluate_hub({'type': 'sphere', 'center': [1, 2, 3], 'radius': 0.5, 'scale': 3.0})
+        self.assertEqual([outputs['hub.centerX'], outputs['hub.centerY'], outputs['hub.centerZ']], [1, 2, 3])
+        self.assertEqual(outputs['hub.scaleFactor'], 3.0)
+        self.assertEqual(outputs['hub.scaledRadius'], 1.5)
+
+    def test_capsule(self):
+        outputs = evaluate_hub({'type': 'capsule2', 'a': [0, 1, 0], 'b': [0, 1, 4], 'radiusA': 0.5, 'radiusB': 0.25, 'scale': 2.0})
+        self.assertEqual(outputs['hub.length'], 4.0)
+        self.assertEqual([outputs['hub.axisX'], outputs['hub.axisY'], outputs['hub.axisZ']], [0, 0, 1])
+        self.assertEqual(outputs['hub.scaledRadiusA'], 1.0)
+        self.assertEqual(outputs['hub.scaledRadiusB'], 0.5)
+
+    def test_cuboid(self):
+        outputs = evaluate_hub({
+            'type': 'cuboid', 'center': [0, 0, 0], 'axes': [[0, 1, 0], [-1, 0, 0], [0, 0, 1]],
+            'width': 2, 'height': 4, 'depth': 6, 'scale': 0.5
+        })
+        self.assertEqual([outputs['hub.vxX'], outputs['hub.vxY'], outputs['hub.vxZ']], [0, 1, 0])
+        self.assertEqual([outputs['hub.halfWidth'], outputs['hub.halfHeight'], outputs['hub.halfDepth']], [1, 2, 3])
+        self.assertEqual([outputs['hub.scaledHalfWidth'], outputs['hub.scaledHalfHeight'], outputs['hub.scaledHalfDepth']], [0.5, 1, 1.5])
+
+    def test_attrs(self):
+        """ every attribute listed in HUB_ATTRS is written """
+        cols = {
+            'sphere': {'type': 'sphere', 'center': [0, 0, 0], 'radius': 1.0},
+            'infinitePlane': {'type': 'infinitePlane', 'center': [0, 0, 0], 'normal': [0, 1, 0]},
+            'capsule': {'type': 'capsule', 'a': [0, 0, 0], 'b': [1, 0, 0], 'radius': 1.0},
+            'capsule2': {'type': 'capsule2', 'a': [0, 0, 0], 'b': [1, 0, 0], 'radiusA': 1.0, 'radiusB': 0.5},
+            'cuboid': {'type': 'cuboid', 'center': [0, 0, 0], 'axes': [[1, 0, 0], [0, 1, 0], [0, 0, 1]], 'width': 1, 'height': 1, 'depth': 1},
+            'heightfield': {
+                'type': 'heightfield', 'center': [0, 0, 0], 'axes': [[1, 0, 0], [0, 1, 0], [0, 0, 1]], 'width': 1, 'depth': 1,
+                'resolution': [2, 2], 'heights': [0, 0, 0, 0]
+            },
+            'sdf': {
+                'type': 'sdf', 'center': [0, 0, 0], 'axes': [[1, 0, 0], [0, 1, 0], [0, 0, 1]],
+                'resolution': [2, 2, 2], 'cellSize': 1.0, 'distances': [0] * 8
+            },
+        }
+        self.assertEqual(sorted(cols), sorted(expstr.HUB_ATTRS))
+        for colliderType, col in cols.items():
+            outputs = evaluate_hub(col)
+            vectors, floats = expstr.HUB_ATTRS[colliderType]
+            expected = ['hub.{}{}'.format(v, a) for v in vectors for a in 'XYZ'] + ['hub.{}'.format(f) for f in floats]
+            self.assertEqual(sorted(outputs), sorted(expected), colliderType)
+
+    def test_detection(self):
+        """ detection reading the hub gives the same result with fewer define ops """
+        col = {'type': 'capsule', 'a': [-1, 0, 0], 'b': [1, 0.5, 0], 'radius': 0.5, 'scale': 1.2}
+        direct = solver.verify([col], [0.2, 0.3, 0.1], radius=0.2, parent=[0, 2, 0], scalable=True)
+        hub = solver.verify([col], [0.2, 0.3, 0.1], radius=0.2, parent=[0, 2, 0], scalable=True, hub=True)
+        self.assertTrue(direct['match'])
+        self.assertTrue(hub['match'])
+        self.assertEqual(direct['output'], hub['output'])
+        self.assertEqual(direct['ops'], hub['ops'])
+        self.assertLess(hub['define_ops']['capsule'], direct['define_ops']['capsule'])
+
+
+if __name__ == '__main__':
+    unittest.main()
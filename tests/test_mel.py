@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from expcol import mel
+
+
+class TestEvaluate(unittest.TestCase):
+
+    def test_arithmetic(self):
+        result = mel.evaluate(
+            "vector $v = <<1, 2, 3>>;\n"
+            "float $f = dot($v, <<1, 0, 0>>) + mag(<<3, 4, 0>>);\n"
+            "int $i = 7 / 2;\n"
+            "node.tx = $v.y * $f;\n",
+            {}
+        )
+        self.assertEqual(result.variables['$f'], 6.0)
+        self.assertEqual(result.variables['$i'], 3)
+        self.assertEqual(result.outputs['node.tx'], 12.0)
+
+    def test_loop(self):
+        result = mel.evaluate(
+            "float $x = 0;\n"
+            "for($i = 0; $i < ctrl.colIteration; $i++)\n"
+            "{\n"
+            "\t$x = $x + ctrl.step;\n"
+            "}\n",
+            {'ctrl.colIteration': 4, 'ctrl.step': 0.5}
+        )
+        self.assertEqual(result.variables['$x'], 2.0)
+        self.assertEqual(result.iterations, 4)
+
+    def test_count(self):
+        result = mel.evaluate(
+            "//define\n"
+            "float $a[] = {1.0, 2.0, node.a};\n"
+            "//loop\n"
+            "for($i = 0; $i < 2; $i++)\n"
+            "{\n"
+            "\t$a[0] = $a[1] + 1;\n"
+            "}\n",
+            {'node.a': 3.0}
+        )
+        # array literal: 3 elements, 1 attribute read and 1 assignment
+        self.assertEqual(result.count('define'), 5)
+        self.assertEqual(result.count('define', define=True), 5)
+        self.assertEqual(result.count('define', loop=True), 0)
+        # loop body: [], + and = for each iteration
+        self.assertEqual(result.count('loop', loop=True), 6)
+        self.assertEqual(result.count(loop=True) + result.count(define=True), result.count())
+
+    def test_unsupported_function(self):
+        with self.assertRaises(mel.MelError):
+            mel.evaluate("float $x = getAttr(1);\n", {})
+
+    def test_missing_attribute(self):
+        with self.assertRaises(mel.MelError):
+            mel.evaluate("float $x = node.missing;\n", {})
+
+    def test_undefined_variable(self):
+        with self.assertRaises(mel.MelError):
+            mel.evaluate("float $x = $y + 1;\n", {})
+
+    def test_index_out_of_range(self):
+        with self.assertRaises(mel.MelError):
+            mel.evaluate("float $a[] = {1.0};\nfloat $x = $a[1];\n", {})
+
+    def test_syntax_error(self):
+        with self.assertRaises(mel.MelError):
+            mel.parse("float $x = (1 + 2;\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
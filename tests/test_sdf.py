@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import math
+import unittest
+
+from expcol import sdf, solver
+
+RESOLUTION = [17, 17, 17]
+CELL_SIZE = 0.25
+RADIUS = 1.0
+
+def sphere_grid(resolution=RESOLUTION, cellSize=CELL_SIZE, radius=RADIUS):
+    """ analytic signed distances of a sphere at the origin """
+    o = sdf.origin(resolution, cellSize)
+    rx, ry, rz = resolution
+    return [
+        math.sqrt((o[0] + i * cellSize)**2 + (o[1] + j * cellSize)**2 + (o[2] + k * cellSize)**2) - radius
+        for k in range(rz) for j in range(ry) for i in range(rx)
+    ]
+
+def length(v):
+    return math.sqrt(sum(x * x for x in v))
+
+
+class TestGrid(unittest.TestCase):
+
+    def test_origin(self):
+        self.assertEqual(sdf.origin([3, 5, 2], 0.5), [-0.5, -1.0, -0.25])
+
+    def test_sample(self):
+        distances = sphere_grid()
+        # on samples, the baked value is returned
+        distance, gradient = sdf.sample(distances, RESOLUTION, CELL_SIZE, [0.5, 0, 0])
+        self.assertAlmostEqual(distance, -0.5)
+        self.assertGreater(gradient[0], 0)
+        # between samples, close to the analytic distance
+        for p in [[0.3, 0.2, -0.1], [-0.7, 0.6, 0.4], [1.2, -0.9, 0.3]]:
+            distance, gradient = sdf.sample(distances, RESOLUTION, CELL_SIZE, p)
+            self.assertAlmostEqual(distance, length(p) - RADIUS, delta=0.05)
+        # outside of the grid
+        self.assertIsNone(sdf.sample(distances, RESOLUTION, CELL_SIZE, [2.5, 0, 0]))
+
+    def test_resolve(self):
+        distances = sphere_grid()
+        for p in [[0.5, 0.1, 0.0], [-0.3, 0.6, 0.2], [0.1, -0.2, -0.8]]:
+            resolved = sdf.resolve(distances, RESOLUTION, CELL_SIZE, p, 0.2)
+            self.assertAlmostEqual(length(resolved), RADIUS + 0.2, delta=0.05)
+        # outside of surface + radius, not moved
+        self.assertEqual(sdf.resolve(distances, RESOLUTION, CELL_SIZE, [1.5, 0, 0], 0.2), [1.5, 0, 0])
+
+    def test_literal(self):
+        self.assertEqual(sdf.literal(0.123456789), '0.12346')
+        self.assertEqual(sdf.literal(-1.0), '-1')
+
+
+class TestCollider(unittest.TestCase):
+
+    def collider(self, **kwargs):
+        col = {
+            'type': 'sdf', 'center': [1, 2, 3], 'axes': [[0, 0, -1], [0, 1, 0], [1, 0, 0]],
+            'resolution': RESOLUTION, 'cellSize': CELL_SIZE, 'distances': sphere_grid()
+        }
+        col.update(kwargs)
+        return col
+
+    def test_push(self):
+        """ detection lands near surface + radius """
+        for p in [[1.4, 2.1, 3.0], [0.5, 2.3, 2.8], [1.1, 1.5, 3.3]]:
+            r = solver.verify([self.collider()], p, radius=0.2, iterations=3)
+            self.assertTrue(r['match'])
+            self.assertAlmostEqual(length([r['output'][a] - [1, 2, 3][a] for a in range(3)]), RADIUS + 0.2, delta=0.05)
+
+    def test_scale(self):
+        r = solver.verify([self.collider(scale=1.5)], [1.4, 2.1, 3.0], radius=0.2, iterations=3, scalable=True)
+        self.assertTrue(r['match'])
+        self.assertAlmostEqual(length([r['output'][a] - [1, 2, 3][a] for a in range(3)]), RADIUS * 1.5 + 0.2, delta=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+import itertools
+import math
+import random
+import unittest
+
+from expcol import sdf, solver
+
+S = math.sqrt(0.5)
+AXES = [[S, 0, -S], [0, 1, 0], [S, 0, S]]
+
+def sdf_sphere(resolution, cellSize, radius):
+    o = sdf.origin(resolution, cellSize)
+    rx, ry, rz = resolution
+    return [
+        math.sqrt((o[0] + i * cellSize)**2 + (o[1] + j * cellSize)**2 + (o[2] + k * cellSize)**2) - radius
+        for k in range(rz) for j in range(ry) for i in range(rx)
+    ]
+
+COLLIDERS = {
+    'sphere': {'type': 'sphere', 'center': [0, 1, 0], 'radius': 1.0, 'scale': 1.5},
+    'infinitePlane': {'type': 'infinitePlane', 'center': [0, -1, 0], 'normal': [0, 1, 0]},
+    'capsule': {'type': 'capsule', 'a': [-1, 0, 0], 'b': [1, 0.5, 0], 'radius': 0.5},
+    'capsule2': {'type': 'capsule2', 'a': [-1, 0, 1], 'b': [1, 0, 1], 'radiusA': 0.3, 'radiusB': 0.8},
+    'cuboid': {'type': 'cuboid', 'center': [0.5, 0, 0], 'axes': AXES, 'width': 1, 'height': 2, 'depth': 1},
+    'heightfield': {
+        'type': 'heightfield', 'center': [0, -0.5, 0], 'axes': AXES, 'width': 4, 'depth': 4,
+        'resolution': [3, 2], 'heights': [0, 0.5, 1, 0.2, 0.4, 0.1]
+    },
+    'sdf': {
+        'type': 'sdf', 'center': [0, 0.2, 0], 'axes': AXES, 'resolution': [5, 5, 5], 'cellSize': 0.5,
+        'distances': sdf_sphere([5, 5, 5], 0.5, 0.8), 'scale': 1.2
+    },
+}
+
+OPTIONS = ['parent', 'scalable', 'radius_rate', 'groundCol', 'hub', 'segment', 'neighbors']
+
+# executed operations of each collider type for GOLDEN_CASE {(type, hub, segment): (per iteration, define block)}.
+# A change of the generated expression that shifts the cost must update these values.
+GOLDEN_CASE = {'p': [0.1, 0.2, 0.3], 'parent': [0, 2, 0], 'iterations': 5, 'radius': 0.3}
+GOLDEN_OPS = {
+    ('capsule', False, False): (24.0, 16),
+    ('capsule', False, True): (62.0, 16),
+    ('capsule', True, False): (24.0, 16),
+    ('capsule', True, True): (62.0, 16),
+    ('capsule2', False, False): (28.0, 18),
+    ('capsule2', False, True): (66.0, 18),
+    ('capsule2', True, False): (28.0, 18),
+    ('capsule2', True, True): (66.0, 18),
+    ('cuboid', False, False): (28.0, 31),
+    ('cuboid', False, True): (102.0, 31),
+    ('cuboid', True, False): (28.0, 28),
+    ('cuboid', True, True): (102.0, 28),
+    ('heightfield', False, False): (69.0, 42),
+    ('heightfield', False, True): (69.0, 42),
+    ('heightfield', True, False): (69.0, 40),
+    ('heightfield', True, True): (69.0, 40),
+    ('infinitePlane', False, False): (5.0, 8),
+    ('infinitePlane', False, True): (5.0, 8),
+    ('infinitePlane', True, False): (5.0, 8),
+    ('infinitePlane', True, True): (5.0, 8),
+    ('sdf', False, False): (140.0, 169),
+    ('sdf', False, True): (140.0, 169),
+    ('sdf', True, False): (140.0, 169),
+    ('sdf', True, True): (140.0, 169),
+    ('sphere', False, False): (13.0, 6),
+    ('sphere', False, True): (20.6, 6),
+    ('sphere', True, False): (13.0, 6),
+    ('sphere', True, True): (20.6, 6),
+}
+
+
+def verify(colliders, p, options, seed=0):
+    rnd = random.Random(seed)
+    return solver.verify(
+        colliders,
+        p,
+        radius=0.3,
+        parent=[0.2, 2.5, -0.1] if 'parent' in options else None,
+        iterations=3,
+        groundHeight=-0.5 if 'groundCol' in options else None,
+        scalable='scalable' in options,
+        radius_rate=0.4 if 'radius_rate' in options else None,
+        tipRadius=0.1,
+        parent_scale=1.3,
+        hub='hub' in options,
+        segment='segment' in options,
+        neighbors=[[p[0] + rnd.uniform(-0.5, 0.5), p[1], p[2] + rnd.uniform(-0.5, 0.5)]] if 'neighbors' in options else None,
+        separation=0.6,
+    )
+
+
+class TestVerify(unittest.TestCase):
+
+    def test_options(self):
+        """ every collider type with every combination of options """
+        rnd = random.Random(1)
+        points = [[rnd.uniform(-1.5, 1.5), rnd.uniform(-1, 1.5), rnd.uniform(-1.5, 1.5)] for i in range(3)]
+        for colliderType, col in sorted(COLLIDERS.items()):
+            for n in range(len(OPTIONS) + 1):
+                for options in itertools.combinations(OPTIONS, n):
+                    for i, p in enumerate(points):
+                        r = verify([col], p, options, seed=i)
+                        self.assertTrue(r['match'], '{} {} {} : error {}'.format(colliderType, options, p, r['error']))
+
+    def test_all_colliders(self):
+        colliders = [COLLIDERS[t] for t in sorted(COLLIDERS)]
+        rnd = random.Random(2)
+        for i in range(20):
+            p = [rnd.uniform(-2, 2) for a in range(3)]
+            options = [o for o in OPTIONS if rnd.random() < 0.5]
+            r = verify(colliders, p, options, seed=i)
+            self.assertTrue(r['match'], '{} {} : error {}'.format(options, p, r['error']))
+
+    def test_no_iteration(self):
+        r = solver.verify([COLLIDERS['sphere']], [0, 1, 0], parent=[0, 3, 0], iterations=0)
+        self.assertTrue(r['match'])
+        self.assertEqual(r['output'], [0, 1, 0])
+
+    def test_golden_ops(self):
+        for colliderType, col in sorted(COLLIDERS.items()):
+            for hub, segment in itertools.product([False, True], [False, True]):
+                r = solver.verify(
+                    [col],
+                    GOLDEN_CASE['p'],
+                    radius=GOLDEN_CASE['radius'],
+                    parent=GOLDEN_CASE['parent'],
+                    iterations=GOLDEN_CASE['iterations'],
+                    hub=hub,
+                    segment=segment
+                )
+                self.assertTrue(r['match'])
+                self.assertEqual(
+                    (r['ops'][colliderType], r['define_ops'][colliderType]),
+                    GOLDEN_OPS[(colliderType, hub, segment)],
+                    '{} hub={} segment={}'.format(colliderType, hub, segment)
+                )
+
+
+class TestKnownAnswers(unittest.TestCase):
+    """ results compared with values computed by hand, not with the reference solver """
+
+    def assertVector(self, a, b, places=7):
+        for x, y in zip(a, b):
+            self.assertAlmostEqual(x, y, places=places)
+
+    def check(self, colliders, p, expected, **kwargs):
+        r = solver.verify(colliders, p, **kwargs)
+        self.assertVector(r['output'], expected)
+        self.assertVector(r['reference'], expected)
+
+    def test_sphere(self):
+        col = {'type': 'sphere', 'center': [1, 2, 3], 'radius': 1.0}
+        self.check([col], [1, 2.5, 3], [1, 3.2, 3], radius=0.2, iterations=1)
+
+    def test_plane(self):
+        col = {'type': 'infinitePlane', 'center': [0, 1, 0], 'normal': [0, 1, 0]}
+        self.check([col], [0.3, 0.5, -2], [0.3, 1.2, -2], radius=0.2, iterations=1)
+
+    def test_capsule(self):
+        col = {'type': 'capsule', 'a': [-2, 0, 0], 'b': [2, 0, 0], 'radius': 0.5}
+        self.check([col], [0.7, 0, 0.3], [0.7, 0, 0.7], radius=0.2, iterations=1)
+        # beyond the end, pushed from the end sphere
+        self.check([col], [2.3, 0, 0], [2.7, 0, 0], radius=0.2, iterations=1)
+
+    def test_capsule2(self):
+        col = {'type': 'capsule2', 'a': [0, 0, 0], 'b': [0, 4, 0], 'radiusA': 1.0, 'radiusB': 0.2}
+        # radius at the middle is 0.6
+        self.check([col], [0.1, 2, 0], [0.8, 2, 0], radius=0.2, iterations=1)
+
+    def test_cuboid(self):
+        col = {'type': 'cuboid', 'center': [0, 0, 0], 'axes': [[1, 0, 0], [0, 1, 0], [0, 0, 1]], 'width': 2, 'height': 2, 'depth': 2}
+        # projected from the center onto the box grown by radius
+        self.check([col], [0.5, 0.2, 0], [1.1, 0.44, 0], radius=0.1, iterations=1)
+
+    def test_ground(self):
+        self.check([], [0.3, -1, 0.2], [0.3, 0.5, 0.2], radius=0.5, iterations=1, groundHeight=0.0)
+
+    def test_keep_length(self):
+        col = {'type': 'infinitePlane', 'center': [0, 0, 0], 'normal': [0, 1, 0]}
+        # link from (0, 1, 0) rotates until the tip is on the plane, (2, 0, 0)
+        r = solver.verify([col], [1, -1, 0], parent=[0, 1, 0], radius=0.0, iterations=30)
+        self.assertTrue(r['match'])
+        self.assertVector(r['output'], [2, 0, 0], places=3)
+
+
+def length(a, b):
+    return math.sqrt(sum((x - y)**2 for x, y in zip(a, b)))
+
+def box_distance(q, col):
+    """ signed distance from q to the box, independent of the solver """
+    d = [q[i] - col['center'][i] for i in range(3)]
+    half = [col['width'] / 2.0, col['height'] / 2.0, col['depth'] / 2.0]
+    e = [abs(sum(v[i] * d[i] for i in range(3))) - h for v, h in zip(col['axes'], half)]
+    outside = math.sqrt(sum(max(x, 0)**2 for x in e))
+    return outside if outside > 0 else max(e)
+
+def segment_distance(q, a, b):
+    ab = [b[i] - a[i] for i in range(3)]
+    t = min(max(sum((q[i] - a[i]) * ab[i] for i in range(3)) / sum(x * x for x in ab), 0), 1)
+    return length(q, [a[i] + ab[i] * t for i in range(3)])
+
+def link_distance(p0, p, distance, samples=500):
+    """ minimum distance over points sampled along the link from p0 to p """
+    return min(distance([p0[i] + (p[i] - p0[i]) * k / float(samples) for i in range(3)]) for k in range(samples + 1))
+
+
+class TestSegment(unittest.TestCase):
+    """ the whole link is checked by sampling, after a realistic colIteration """
+
+    iterations = 3
+
+    def check(self, col, p, parent, radius, distance):
+        self.assertLess(link_distance(parent, p, distance), radius)
+        r = solver.verify([col], p, radius=radius, parent=parent, iterations=self.iterations, segment=True)
+        self.assertTrue(r['match'], r['error'])
+        self.assertGreaterEqual(link_distance(parent, r['output'], distance), radius - 1e-6)
+        self.assertAlmostEqual(length(r['output'], parent), length(p, parent))
+
+    def test_sphere(self):
+        col = {'type': 'sphere', 'center': [0, 0, 0], 'radius': 1.0}
+        self.check(col, [0.3, -3, 0.1], [0.2, 3, 0], 0.1, lambda q: length(q, col['center']) - 1.0)
+
+    def test_capsule(self):
+        col = {'type': 'capsule', 'a': [-2, 0, 0], 'b': [2, 0, 0], 'radius': 0.5}
+        self.check(col, [0.5, -3, 0.2], [0, 3, 0], 0.1, lambda q: segment_distance(q, col['a'], col['b']) - 0.5)
+
+    def test_cuboid_through(self):
+        """ link passes through the box, but its point closest to the center is outside """
+        col = {'type': 'cuboid', 'center': [0, 0, 0], 'axes': [[1, 0, 0], [0, 1, 0], [0, 0, 1]], 'width': 10, 'height': 1, 'depth': 1}
+        self.check(col, [6, 5, 0], [3, -5, 0], 0.1, lambda q: box_distance(q, col))
+        r = solver.verify([col], [6, 5, 0], radius=0.1, parent=[3, -5, 0], iterations=3, segment=False)
+        self.assertEqual(r['output'], [6, 5, 0])
+
+    def test_cuboid_vertical(self):
+        """ link nearly parallel to the height axis of a thin box is pushed sideways """
+        col = {'type': 'cuboid', 'center': [0, 0, 0], 'axes': [[1, 0, 0], [0, 1, 0], [0, 0, 1]], 'width': 2, 'height': 1, 'depth': 2}
+        self.check(col, [0.3, -3, 0.2], [0.2, 3, 0], 0.1, lambda q: box_distance(q, col))
+
+    def test_cuboid_rotated(self):
+        col = dict(COLLIDERS['cuboid'], center=[0, 0, 0])
+        self.check(col, [0.4, -3, -0.3], [0, 3, 0.2], 0.2, lambda q: box_distance(q, col))
+
+
+class TestSolve(unittest.TestCase):
+
+    def test_separation(self):
+        """ two symmetric links end exactly at separation, regardless of iterations """
+        a = [-0.1, 0, 0.3]
+        b = [0.1, 0, 0.3]
+        for iterations in [1, 3, 10]:
+            pa = solver.solve(a, 0.1, [], iterations, neighbors=[b], separation=1.0)
+            pb = solver.solve(b, 0.1, [], iterations, neighbors=[a], separation=1.0)
+            self.assertAlmostEqual(math.sqrt(sum((x - y)**2 for x, y in zip(pa, pb))), 1.0)
+            r = solver.verify([], a, radius=0.1, iterations=iterations, neighbors=[b], separation=1.0)
+            self.assertTrue(r['match'])
+            self.assertAlmostEqual(r['output'][0], -0.5)
+
+    def test_sphere_push(self):
+        p = solver.solve([0, 0.5, 0], 0.5, [COLLIDERS['sphere']])
+        self.assertAlmostEqual(math.sqrt((p[1] - 1.0)**2 + p[0]**2 + p[2]**2), 1.5)
+
+    def test_keep_length(self):
+        p = solver.solve([0, 0.5, 0], 0.5, [COLLIDERS['sphere']], parent=[0, 3, 0])
+        self.assertAlmostEqual(math.sqrt(p[0]**2 + (p[1] - 3)**2 + p[2]**2), 2.5)
+
+
+if __name__ == '__main__':
+    unittest.main()